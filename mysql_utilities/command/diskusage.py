@@ -23,6 +23,9 @@ import locale
 import os
 import sys
 
+from collections import deque
+from multiprocessing.pool import ThreadPool
+
 from mysql_utilities.exception import UtilError
 from mysql_utilities.common.format import print_list
 from mysql_utilities.common.tools import encode
@@ -34,6 +37,23 @@ _KB = 1024.0
 _MB = 1024.0 * _KB
 _GB = 1024.0 * _MB
 _TB = 1024.0 * _GB
+_UNITS = (('bytes', 1), ('KB', _KB), ('MB', _MB), ('GB', _GB), ('TB', _TB))
+
+# Maximum number of threads used to scan directories and minimum number of
+# directories needed to scan them concurrently.
+_MAX_SCAN_THREADS = min(32, (os.cpu_count() or 1) * 4)
+_MIN_PARALLEL_FOLDERS = 4
+
+# Data files and log tables, i.e. everything in a database directory that is
+# not a miscellaneous file (uppercase, compared case-insensitively).
+_DATA_FILE_EXTS = frozenset(('.MYD', '.MYI', '.IBD'))
+_LOG_TABLE_NAMES = frozenset(('SLOW_LOG', 'GENERAL_LOG'))
+
+# Values of have_innodb and ENGINES.SUPPORT meaning InnoDB is not available.
+_INNODB_DISABLED = frozenset(("NO", "DISABLED"))
+
+# Digit grouping conventions of the current locale (see _load_grouping).
+_GROUPING = {}
 
 _QUERY_DATAFREE = """
     SELECT DISTINCT data_free
@@ -41,41 +61,89 @@ _QUERY_DATAFREE = """
     WHERE UPPER(engine) = 'INNODB'
 """
 
+_QUERY_VARIABLES = "SHOW VARIABLES WHERE Variable_name IN ({0})"
+
+# Databases with no tables (not listed in INFORMATION_SCHEMA.TABLES) are
+# also returned with a NULL size.
 _QUERY_DBSIZE = """
-    SELECT table_schema AS db_name, SUM(data_length + index_length) AS size
-    FROM INFORMATION_SCHEMA.TABLES %s
-    GROUP BY db_name
+    SELECT s.schema_name AS db_name, t.size
+    FROM INFORMATION_SCHEMA.SCHEMATA s
+    LEFT JOIN (
+        SELECT table_schema, SUM(data_length + index_length) AS size
+        FROM INFORMATION_SCHEMA.TABLES
+        GROUP BY table_schema
+    ) t ON t.table_schema = s.schema_name
+    %s
+    ORDER BY db_name
 """
 
 
+def _load_grouping():
+    """Load the digit grouping conventions of the current locale.
+
+    The conventions are read once (and again whenever the locale is set)
+    instead of querying the locale for each number formatted.
+    """
+    conv = locale.localeconv()
+    _GROUPING['sep'] = conv['thousands_sep']
+    _GROUPING['point'] = conv['decimal_point']
+    # Most locales group digits by thousands, which str.format() supports.
+    _GROUPING['thousands'] = conv['grouping'] in ([3, 0], [3, 3, 0])
+
+
+def _group_int(value):
+    """Format an integer using the digit grouping of the current locale.
+
+    value[in]         Integer value to format.
+
+    returns (string) formatted value. e.g. 12345 as 12,345 for US locale
+    """
+    if not _GROUPING:
+        _load_grouping()
+    sep = _GROUPING['sep']
+    if not sep:
+        return "{0:d}".format(value)
+    if _GROUPING['thousands']:
+        grouped = "{0:,d}".format(value)
+        return grouped if sep == ',' else grouped.replace(',', sep)
+    return locale.format_string("%d", value, grouping=True)
+
+
+def _group_float(value):
+    """Format a number with two decimals using the current locale.
+
+    value[in]         Number to format.
+
+    returns (string) formatted value. e.g. 12345.6 as 12,345.60 for US locale
+    """
+    if not _GROUPING:
+        _load_grouping()
+    sep = _GROUPING['sep']
+    if not sep:
+        formatted = "{0:.2f}".format(value)
+    elif _GROUPING['thousands']:
+        formatted = "{0:,.2f}".format(value)
+    else:
+        return locale.format_string("%.2f", value, grouping=True)
+    return formatted.translate({ord(','): sep, ord('.'): _GROUPING['point']})
+
+
 def _print_size(prefix, total):
     """Print size formatted with commas and estimated to the largest XB.
 
     prefix[in]        The preamble to the size. e.g. "Total XXX ="
     total[in]         Integer value to format.
     """
-    msg = "{0}{1} bytes".format(prefix, locale.format("%d", total,
-                                                      grouping=True))
-
-    # Calculate largest XByte...
-    if total > _TB:
-        converted = total / _TB
-        print(("{0} or {1} TB".format(msg, locale.format("%.2f", converted,
-                                                        grouping=True))))
-    elif total > _GB:
-        converted = total / _GB
-        print(("{0} or {1} GB".format(msg, locale.format("%.2f", converted,
-                                                        grouping=True))))
-    elif total > _MB:
-        converted = total / _MB
-        print(("{0} or {1} MB".format(msg, locale.format("%.2f", converted,
-                                                        grouping=True))))
-    elif total > _KB:
-        converted = total / _KB
-        print(("{0} or {1} KB".format(msg, locale.format("%.2f", converted,
-                                                        grouping=True))))
-    else:
-        print(msg)
+    msg = "{0}{1} bytes".format(prefix, _group_int(total))
+
+    # Calculate largest XByte, i.e. the largest unit (1024 ** i) exceeded
+    # by the total.
+    unit = max(0, (int(total) - 1).bit_length() - 1) // 10
+    unit = min(unit, len(_UNITS) - 1)
+    if unit:
+        name, size = _UNITS[unit]
+        msg = "{0} or {1} {2}".format(msg, _group_float(total / size), name)
+    print(msg)
 
 
 def _get_formatted_max_width(rows, columns, col):
@@ -90,104 +158,225 @@ def _get_formatted_max_width(rows, columns, col):
     if rows is None or rows == [] or col >= len(rows[0]):
         return width
 
-    for row in rows:
-        size = len(locale.format("%d", row[col], grouping=True))
-        col_size = len(columns[col])
-        if size > width:
-            width = size
-        if col_size > width:
-            width = col_size
+    # The largest value has the widest formatted representation.
+    width = len(_group_int(max(row[col] for row in rows)))
+    col_size = len(columns[col])
+    if col_size > width:
+        width = col_size
     return int(width)
 
 
-def _get_folder_size(folder):
-    """Get size of folder (directory) and all its contents
+def _list_db_dir(folder):
+    """List the files and subfolders of a database directory.
 
-    folder[in]        Folder to calculate
+    folder[in]        The folder to list
 
-    return (int) size of folder or 0 if empty or None if not exists or error
+    returns (tuple) (files[], subfolders[]) with (size, is_misc) entries
+                    for files and (path, stat, is_misc) entries for
+                    subfolders, where is_misc is True for miscellaneous
+                    files (see _scan_db_dir).
     """
+    files = []
+    subfolders = []
+    with os.scandir(folder) as entries:
+        for entry in entries:
+            name, ext = os.path.splitext(entry.name)
+            is_misc = ext.upper() not in _DATA_FILE_EXTS and \
+                name.upper() not in _LOG_TABLE_NAMES
+            # Follow symbolic links, as MySQL supports symlinked databases
+            # and tables.
+            try:
+                if entry.is_file():
+                    files.append((entry.stat().st_size, is_misc))
+                elif entry.is_dir():
+                    subfolders.append((entry.path, entry.stat(), is_misc))
+            except OSError:
+                continue  # Entry removed since the directory was read.
+    return (files, subfolders)
+
+
+def _scan_db_dir(folder):
+    """Calculate the disk space used by a database directory.
+
+    This method walks the directory once and returns both the size of the
+    directory and all its contents, and the size of the miscellaneous files
+    in it, i.e. all files except for the data files (.myd, .myi, .ibd) and
+    the log tables (slow_log, general_log).
 
+    folder[in]        The folder to sum
+
+    returns (tuple) (dbdir_size, misc_files_size) or (None, None) if not
+                    exists or error
+    """
     try:
-        total_size = os.path.getsize(folder)
+        folder_stat = os.stat(folder)
     except:
-        return None
-    for item in os.listdir(folder):
-        itempath = os.path.join(folder, item)
-        if os.path.isfile(itempath):
-            total_size += os.path.getsize(itempath)
-        elif os.path.isdir(itempath):
-            total_size += _get_folder_size(itempath)
-    return total_size
-
+        return (None, None)
+    total_size = 0
+    misc_size = 0
+    # Walk the directory tree with an explicit stack of (path, stat, is_misc)
+    # instead of recursion. Everything below a folder that is not a
+    # miscellaneous one is not miscellaneous either. Symbolic links are
+    # followed, so the folders already visited are skipped to avoid loops.
+    stack = deque([(folder, folder_stat, True)])
+    visited = set([(folder_stat.st_dev, folder_stat.st_ino)])
+    while stack:
+        path, path_stat, in_misc = stack.pop()
+        total_size += path_stat.st_size
+        if in_misc:
+            misc_size += path_stat.st_size
+        files, subfolders = _list_db_dir(path)
+        for size, is_misc in files:
+            total_size += size
+            if in_misc and is_misc:
+                misc_size += size
+        for subfolder, subfolder_stat, is_misc in subfolders:
+            folder_id = (subfolder_stat.st_dev, subfolder_stat.st_ino)
+            if folder_id in visited:
+                continue
+            visited.add(folder_id)
+            stack.append((subfolder, subfolder_stat, in_misc and is_misc))
+    return (total_size, misc_size)
+
+
+def _map_folders(func, folders):
+    """Apply a function to each folder of a list.
+
+    Walking directories is bound by the latency of the file system, so the
+    folders are processed concurrently by a pool of threads. Short lists are
+    processed sequentially to avoid the cost of starting the threads.
+
+    func[in]          Function to apply, receives the folder path
+    folders[in]       List of folder paths
+
+    returns (list) result of func for each folder (in the same order)
+    """
+    if len(folders) <= _MIN_PARALLEL_FOLDERS:
+        return [func(folder) for folder in folders]
+    pool = ThreadPool(processes=min(_MAX_SCAN_THREADS, len(folders)))
+    try:
+        return pool.map(func, folders)
+    finally:
+        pool.close()
+        pool.join()
 
-def _get_db_dir_size(folder):
-    """Calculate total disk space used for a given directory.
 
-    This method will sum all files in the directory except for the
-    MyISAM files (.myd, .myi).
+def _read_tablespace_folder(folder, verbosity=0):
+    """Read the tablespace files and the subfolders of a folder.
 
-    folder[in]        The folder to sum
+    folder[in]        The folder to read
+    verbosity[in]     Determines how much information to display
 
-    returns (int) sum of files in directory or None if not exists
+    return (tuple) (tablespaces[], subfolders[]) where subfolders has
+                   (path, (st_dev, st_ino)) entries
     """
-    try:
-        total_size = os.path.getsize(folder)
-    except:
-        return None
-    for item in os.listdir(folder):
-        name, ext = os.path.splitext(item)
-        if ext.upper() not in (".MYD", ".MYI", ".IBD") and \
-           name.upper() not in ('SLOW_LOG', 'GENERAL_LOG'):
-            itemfolder = os.path.join(folder, item)
-            if os.path.isfile(itemfolder):
-                total_size += os.path.getsize(itemfolder)
-            elif os.path.isdir(itemfolder):
-                total_size += _get_db_dir_size(itemfolder)
-    return total_size
-
-
-def _find_tablespace_files(folder, verbosity=0):
+    tablespaces = []
+    subfolders = []
+    with os.scandir(folder) as entries:
+        for entry in entries:
+            # Follow symbolic links, as MySQL supports symlinked databases.
+            if entry.is_dir():
+                try:
+                    entry_stat = entry.stat()
+                except OSError:
+                    continue
+                subfolders.append((entry.path, (entry_stat.st_dev,
+                                                entry_stat.st_ino)))
+                continue
+            # Check the extension first to avoid a stat() on files
+            # that are not tablespaces.
+            _, ext = os.path.splitext(entry.name)
+            if ext.upper() == ".IBD" and entry.is_file():
+                size = entry.stat().st_size
+                if verbosity > 0:
+                    row = (entry.name, size, 'file tablespace', '')
+                else:
+                    row = (entry.name, size)
+
+                tablespaces.append(row)
+    return tablespaces, subfolders
+
+
+def _find_tablespace_files(folder, verbosity=0, parallel=False,
+                           visited=None):
     """Find all tablespace files located in the datadir.
 
     folder[in]        The folder to search
+    verbosity[in]     Determines how much information to display
+    parallel[in]      If True, search the subfolders concurrently
+    visited[in]       Set of (st_dev, st_ino) of the folders already
+                      searched, used to avoid loops through symbolic links
 
     return (tuple) (tablespaces[], total_size)
     """
-    total = 0
-    tablespaces = []
-    # skip inaccessible files.
+    if visited is None:
+        try:
+            folder_stat = os.stat(folder)
+        except:
+            return (None, None)
+        visited = set([(folder_stat.st_dev, folder_stat.st_ino)])
     try:
-        for item in os.listdir(folder):
-            itempath = os.path.join(folder, item)
-            _, ext = os.path.splitext(item)
-            if os.path.isfile(itempath):
-                _, ext = os.path.splitext(item)
-                if ext.upper() == "IBD":
-                    size = os.path.getsize(itempath)
-                    total += size
-                    if verbosity > 0:
-                        row = (item, size, 'file tablespace', '')
-                    else:
-                        row = (item, size)
-
-                    tablespaces.append(row)
-            else:
-                subdir, tot = _find_tablespace_files(itempath, verbosity)
-                if subdir is not None:
-                    total += tot
-                    tablespaces.extend(subdir)
+        tablespaces, subfolders = _read_tablespace_folder(folder, verbosity)
     except:
         return (None, None)
+    subfolders = [(path, folder_id) for path, folder_id in subfolders
+                  if folder_id not in visited]
+    visited.update(folder_id for _, folder_id in subfolders)
+    subfolders = [path for path, _ in subfolders]
+
+    if parallel:
+        # Each subfolder is searched with its own copy of the visited set.
+        results = _map_folders(
+            lambda path: _find_tablespace_files(path, verbosity,
+                                                visited=set(visited)),
+            subfolders)
+        for subdir, _ in results:
+            if subdir is not None:
+                tablespaces.extend(subdir)
+    else:
+        # Walk the subfolders with an explicit stack instead of recursion.
+        stack = deque(subfolders)
+        while stack:
+            # skip inaccessible files.
+            try:
+                subdir, subfolders = _read_tablespace_folder(stack.pop(),
+                                                             verbosity)
+            except:
+                continue
+            tablespaces.extend(subdir)
+            for path, folder_id in subfolders:
+                if folder_id not in visited:
+                    visited.add(folder_id)
+                    stack.append(path)
+
+    # The size is the second item of each row.
+    return tablespaces, sum(row[1] for row in tablespaces)
+
+
+def _get_server_variables(server, names):
+    """Get the values of a list of server variables.
+
+    The values are retrieved with a single query instead of one query (and
+    round-trip to the server) per variable.
+
+    server[in]        Connected server
+    names[in]         List of variable names
 
-    return tablespaces, total
+    returns (dict) values of the variables by (lowercase) name; variables
+                   not defined in the server are not included.
+    """
+    res = server.exec_query(
+        _QUERY_VARIABLES.format(", ".join(["%s"] * len(names))),
+        {'params': tuple(names)}
+    )
+    return dict((row[0].lower(), row[1]) for row in res)
 
 
-def _build_logfile_list(server, log_name, suffix='_file'):
+def _build_logfile_list(variables, log_name, suffix='_file'):
     """Build a list of all log files based on the system variable by the
     same name as log_name.
 
-    server[in]        Connected server
+    variables[in]     Dictionary with the values of the server variables
     log_name[in]      Name of log (e.g. slow_query_log)
     suffix[in]        Suffix of log variable name (e.g. slow_query_log_file)
                       default = '_file'
@@ -195,34 +384,40 @@ def _build_logfile_list(server, log_name, suffix='_file'):
     return (tuple) (logfiles[], path to log files, total size)
     """
     log_path = None
-    res = server.show_server_variable(log_name)
-    if res != [] and res[0][1].upper() == 'OFF':
+    value = variables.get(log_name)
+    if value is not None and value.upper() == 'OFF':
         print("# The %s is turned off on the server." % log_name)
     else:
-        res = server.show_server_variable(log_name + suffix)
-        if res == []:
+        log_path = variables.get(log_name + suffix)
+        if log_path is None:
             raise UtilError("Cannot get %s_file setting." % log_name)
-        log_path = res[0][1]
 
-        if os.access(log_path, os.R_OK):
-            parts = os.path.split(log_path)
-            if len(parts) <= 1:
-                log_file = log_path
-            else:
-                log_file = parts[1]
-            log_path_size = os.path.getsize(log_path)
-            return (log_file, log_path, int(log_path_size))
+        # Only readable log files are reported (stat() alone succeeds even
+        # without read permission).
+        if not os.access(log_path, os.R_OK):
+            return None, 0, 0
+        try:
+            log_path_size = os.stat(log_path).st_size
+        except OSError:
+            return None, 0, 0
+        parts = os.path.split(log_path)
+        if len(parts) <= 1:
+            log_file = log_path
+        else:
+            log_file = parts[1]
+        return (log_file, log_path, int(log_path_size))
     return None, 0, 0
 
 
-def _get_log_information(server, log_name, suffix='_file', is_remote=False):
+def _get_log_information(variables, log_name, suffix='_file',
+                         is_remote=False):
     """Get information about a specific log.
 
     This method checks the system variable of the log_name passed to see if
     it is turned on. If turned on, the method returns a list of the log files
     and the total of the log files.
 
-    server[in]        Connected server
+    variables[in]     Dictionary with the values of the server variables
     log_name[in]      Variable name for the log (e.g. slow_query_log)
     suffix[in]        Suffix of log variable name (e.g. slow_query_log_file)
                       default = '_file'
@@ -235,14 +430,13 @@ def _get_log_information(server, log_name, suffix='_file', is_remote=False):
               "".format(log_name)))
         return (None, 0,)
 
-    res = server.show_server_variable(log_name)
-    if res != [] and res[0][1].upper() == 'OFF':
+    value = variables.get(log_name)
+    if value is not None and value.upper() == 'OFF':
         print("# The %s is turned off on the server." % log_name)
     else:
-        log_file, log_path, log_size = _build_logfile_list(server, log_name,
-                                                           suffix)
-        if log_file is None or log_path is None or \
-           not os.access(log_path, os.R_OK):
+        log_file, log_path, log_size = _build_logfile_list(variables,
+                                                           log_name, suffix)
+        if log_file is None or log_path is None:
             print("# %s information is not accessible. " % log_name + \
                   "Check your permissions.")
             return None, 0
@@ -260,19 +454,16 @@ def _build_log_list(folder, prefix):
 
     return (tuple) (binlogfiles[], total size)
     """
-    total_size = 0
     binlogs = []
     if prefix is not None:
-        for item in os.listdir(folder):
-            name, _ = os.path.splitext(item)
-            if name.upper() == prefix.upper():
-                itempath = os.path.join(folder, item)
-                if os.path.isfile(itempath):
-                    size = os.path.getsize(itempath)
-                    binlogs.append((item, size))
-                    total_size += os.path.getsize(itempath)
+        prefix = prefix.upper()
+        with os.scandir(folder) as entries:
+            for entry in entries:
+                name, _ = os.path.splitext(entry.name)
+                if name.upper() == prefix and entry.is_file():
+                    binlogs.append((entry.name, entry.stat().st_size))
     binlogs.sort()
-    return binlogs, total_size
+    return binlogs, sum(size for _, size in binlogs)
 
 
 def _build_innodb_list(per_table, folder, datadir, specs, verbosity=0):
@@ -280,7 +471,7 @@ def _build_innodb_list(per_table, folder, datadir, specs, verbosity=0):
 
     This method builds a list of all InnoDB tablespace files and related
     files. It will search all database directories if per_table is True.
-    Returns total size of all files found.
+    Returns total size of all files found and the size of the largest one.
 
     The verbosity argument controls how much data is shown:
           0 : no additional information
@@ -292,54 +483,55 @@ def _build_innodb_list(per_table, folder, datadir, specs, verbosity=0):
     specs[in]         List of specifications
     verbosity[in]     Determines how much information to display
 
-    return (tuple) (tablespacefiles[], total size)
+    return (tuple) (tablespacefiles[], total size, max size)
     """
     total_size = 0
+    max_size = 0
     tablespaces = []
     # Here, we want to capture log files as well as tablespace files.
-    # pylint: disable=R0101
-    if specs is not None:
-        for item in os.listdir(folder):
-            name, _ = os.path.splitext(item)
-            # Check specification list
-            for spec in specs:
-                parts = spec.split(":")
-                if len(parts) < 1:
-                    break
-                if name.upper() == parts[0].upper():
-                    itempath = os.path.join(folder, item)
-                    if os.path.isfile(itempath):
-                        size = os.path.getsize(itempath)
-                        if verbosity > 0:
-                            row = (item, size, 'shared tablespace', spec)
-                        else:
-                            row = (item, size)
-                        tablespaces.append(row)
-                        total_size += os.path.getsize(itempath)
-                elif name[0:6].upper() == "IB_LOG":
-                    itempath = os.path.join(folder, item)
-                    if os.path.isfile(itempath):
-                        size = os.path.getsize(itempath)
-                        if verbosity > 0:
-                            row = (item, size, 'log file', '')
-                        else:
-                            row = (item, size)
-                        if row not in tablespaces:
-                            tablespaces.append(row)
-                        total_size += os.path.getsize(itempath)
+    if specs:
+        # Map the (uppercase) file name of each specification to the
+        # specification itself so each entry needs a single lookup.
+        spec_names = {}
+        for spec in specs:
+            spec_names.setdefault(spec.split(":")[0].upper(), spec)
+        with os.scandir(folder) as entries:
+            for entry in entries:
+                name, _ = os.path.splitext(entry.name)
+                name = name.upper()
+                spec = spec_names.get(name)
+                if spec is not None:
+                    file_type = 'shared tablespace'
+                elif name.startswith("IB_LOG"):
+                    file_type, spec = 'log file', ''
+                else:
+                    continue
+                if entry.is_file():
+                    size = entry.stat().st_size
+                    if verbosity > 0:
+                        row = (entry.name, size, file_type, spec)
+                    else:
+                        row = (entry.name, size)
+                    tablespaces.append(row)
+                    total_size += size
+                    if size > max_size:
+                        max_size = size
 
     # Check to see if innodb_file_per_table is ON
     if per_table:
-        tablespace_files, total = _find_tablespace_files(datadir, verbosity)
-        tablespaces.extend(tablespace_files)
-        total_size += total
+        tablespace_files, total = _find_tablespace_files(datadir, verbosity,
+                                                         parallel=True)
+        if tablespace_files:
+            tablespaces.extend(tablespace_files)
+            total_size += total
+            max_size = max(max_size,
+                           max(row[1] for row in tablespace_files))
 
     tablespaces.sort()
-    return tablespaces, total_size
+    return tablespaces, total_size, max_size
 
 
-def _build_db_list(server, rows, include_list, datadir, fmt=False,
-                   have_read=False, verbosity=0, include_empty=True,
+def _build_db_list(rows, datadir, fmt=False, have_read=False, verbosity=0,
                    is_remote=False):
     """Build a list of all databases and their totals.
 
@@ -363,14 +555,12 @@ def _build_db_list(server, rows, include_list, datadir, fmt=False,
          > 0 : include data size (calculated) and size of misc files
         >= 2 : also include database directory actual size
 
-    server[in]        Connected server
     rows[in]          A list of databases and their calculated sizes
-    include_list[in]  A list of databases included on the command line
+                      (None for databases without tables)
     datadir[in]       The data directory
     fmt[in]           If True, format columns and rows to standard sizes
     have_read[in]     If True, user has read access to datadir path
     verbosity[in]     Controls how much data is shown
-    include_empty[in] Include empty databases in list
     is_remote[in]     True is a remote server
 
     return (tuple) (column headers, rows, total size)
@@ -379,30 +569,32 @@ def _build_db_list(server, rows, include_list, datadir, fmt=False,
     total = 0
     results = []
 
-    # build the list
-    for row in rows:
-        # If user can read the datadir, calculate actual and misc file totals
-        if have_read and not is_remote:
-            # Encode database name (with strange characters) to the
-            # corresponding directory name.
-            db_dir = encode(row[0])
-            dbdir_size = _get_folder_size(os.path.join(datadir, db_dir))
-            misc_files = _get_db_dir_size(os.path.join(datadir, db_dir))
-        else:
-            dbdir_size = 0
-            misc_files = 0
-
-        if row[1] is None:
-            data_size = 0
-            db_total = 0
-        else:
-            data_size = int(row[1])
-            db_total = dbdir_size
+    # Without access to the datadir, only the calculated size is known.
+    if not have_read or is_remote:
+        for row in rows:
+            db_total = int(row[1]) if row[1] is not None else 0
+            total += db_total
+            results.append((row[0], db_total))
+        num_cols = 1
+    else:
+        # Calculate actual and misc file totals. Encode database name
+        # (with strange characters) to the corresponding directory name.
+        db_dirs = [os.path.join(datadir, encode(row[0])) for row in rows]
+        dir_sizes = _map_folders(_scan_db_dir, db_dirs)
+
+        # build the list
+        for row, (dbdir_size, misc_files) in zip(rows, dir_sizes):
+            if row[1] is None:
+                data_size = 0
+                db_total = 0
+            else:
+                data_size = int(row[1])
+                db_total = dbdir_size
 
-        # Count total for all databases
-        total += dbdir_size
+            # Count total for all databases. Use the reported total so the
+            # rows sum up to it, as empty databases report a total of 0.
+            total += db_total
 
-        if have_read and not is_remote:
             if verbosity >= 2:  # get all columns
                 results.append((row[0], dbdir_size, data_size, misc_files,
                                 db_total))
@@ -410,13 +602,8 @@ def _build_db_list(server, rows, include_list, datadir, fmt=False,
                 results.append((row[0], data_size, misc_files, db_total))
             else:
                 results.append((row[0], db_total))
-        else:
-            results.append((row[0], db_total))
 
-    if have_read and not is_remote and verbosity > 0:
-        num_cols = min(verbosity + 2, 4)
-    else:
-        num_cols = 1
+        num_cols = min(verbosity + 2, 4) if verbosity > 0 else 1
 
     # Build column list and format if necessary
     col_list = ['db_name']
@@ -438,69 +625,18 @@ def _build_db_list(server, rows, include_list, datadir, fmt=False,
         fmt_cols.append(col_list[0])
         for i in range(0, num_cols):
             max_col[i] = _get_formatted_max_width(results, col_list, i + 1)
-            fmt_cols.append("{0:>{1}}".format(col_list[i + 1], max_col[i]))
+            fmt_cols.append(col_list[i + 1].rjust(max_col[i]))
     else:
         fmt_cols = col_list
 
     # format the list if needed
-    fmt_rows = []
     if fmt:
-        for row in results:
-            fmt_data = ['', '', '', '', '']
-            # Put in commas and justify strings
-            for i in range(0, num_cols):
-                fmt_data[i] = locale.format("%d", row[i + 1], grouping=True)
-            if num_cols == 4:  # get all columns
-                fmt_rows.append((row[0], fmt_data[0], fmt_data[1],
-                                 fmt_data[2], fmt_data[3]))
-            elif num_cols == 3:
-                fmt_rows.append((row[0], fmt_data[0], fmt_data[1],
-                                 fmt_data[2]))
-            else:
-                fmt_rows.append((row[0], fmt_data[0]))
+        # Put in commas (rows hold the name and num_cols sizes)
+        fmt_rows = [(row[0],) + tuple(map(_group_int, row[1:]))
+                    for row in results]
     else:
         fmt_rows = results
 
-    # pylint: disable=R0101
-    if include_empty:
-        dbs = server.exec_query("SHOW DATABASES")
-        if len(fmt_rows) != len(dbs) - 1:
-            # We have orphaned database - databases not listed in IS.TABLES
-            exclude_list = []
-            for row in fmt_rows:
-                exclude_list.append(row[0])
-            for db in dbs:
-                if db[0].upper() != "INFORMATION_SCHEMA" and \
-                        db[0] not in exclude_list and \
-                        (include_list is None or include_list == [] or
-                         db[0] in include_list):
-                    if fmt:
-                        fmt_data = ['', '', '', '', '']
-                        for i in range(0, num_cols):
-                            if isinstance(row[i + 1], int):
-                                fmt_data[i] = locale.format("%s",
-                                                            int(row[i + 1]),
-                                                            grouping=True)
-                            else:
-                                fmt_data[i] = locale.format("%s", row[i + 1],
-                                                            grouping=True)
-                        if num_cols == 4:  # get all columns
-                            fmt_rows.insert(0, (db[0], fmt_data[0],
-                                                fmt_data[1], fmt_data[2],
-                                                fmt_data[3]))
-                        elif num_cols == 3:
-                            fmt_rows.insert(0, (db[0], fmt_data[0],
-                                                fmt_data[1], fmt_data[2]))
-                        else:
-                            fmt_rows.insert(0, (db[0], fmt_data[0]))
-                    else:
-                        if num_cols == 4:
-                            fmt_rows.insert(0, (db[0], 0, 0, 0, 0))
-                        elif num_cols == 3:
-                            fmt_rows.insert(0, (db[0], 0, 0, 0))
-                        else:
-                            fmt_rows.insert(0, (db[0], 0))
-
     return (fmt_cols, fmt_rows, total)
 
 
@@ -531,29 +667,26 @@ def show_database_usage(server, datadir, dblist, options):
         verbosity = 0
 
     locale.setlocale(locale.LC_ALL, '')
+    _load_grouping()
 
     # Check to see if we're doing all databases.
+    # The database names are passed as query parameters.
     if len(dblist) > 0:
-        include_list = "("
-        stop = len(dblist)
-        for i in range(0, stop):
-            include_list += "'%s'" % dblist[i]
-            if i < stop - 1:
-                include_list += ", "
-        include_list += ")"
-        where_clause = "WHERE table_schema IN %s" % include_list
-        where_clause += " AND table_schema != 'INFORMATION_SCHEMA'"
+        placeholders = ", ".join(["%s"] * len(dblist))
+        where_clause = "WHERE s.schema_name IN ({0})".format(placeholders)
+        where_clause += " AND s.schema_name != 'INFORMATION_SCHEMA'"
     else:
-        where_clause = "WHERE table_schema != 'INFORMATION_SCHEMA'"
+        where_clause = "WHERE s.schema_name != 'INFORMATION_SCHEMA'"
+    # Skip databases without tables if empty databases are not included.
+    if not (include_empty or do_all):
+        where_clause += " AND t.table_schema IS NOT NULL"
 
-    res = server.exec_query(_QUERY_DBSIZE % where_clause)
+    res = server.exec_query(_QUERY_DBSIZE % where_clause,
+                            {'params': tuple(dblist)})
 
     # Get list of databases with sizes and formatted when necessary
-    columns, rows, db_total = _build_db_list(server, res, dblist, datadir,
-                                             fmt == "grid",
-                                             have_read, verbosity,
-                                             include_empty or do_all,
-                                             is_remote)
+    columns, rows, db_total = _build_db_list(res, datadir, fmt == "grid",
+                                             have_read, verbosity, is_remote)
 
     if not quiet:
         print("# Database totals:")
@@ -589,10 +722,18 @@ def show_logfile_usage(server, options):
         ('general_log', '_file'), ('slow_query_log', '_file'),
         ('log_error', '')
     ]
+    # Get the log variables for all logs at once.
+    variables = {}
+    if not is_remote:
+        names = set()
+        for log_name, suffix in _LOG_NAMES:
+            names.add(log_name)
+            names.add(log_name + suffix)
+        variables = _get_server_variables(server, sorted(names))
     logs = []
     for log_name in _LOG_NAMES:
-        (log, size,) = _get_log_information(server, log_name[0], log_name[1],
-                                            is_remote)
+        (log, size,) = _get_log_information(variables, log_name[0],
+                                            log_name[1], is_remote)
         if log is not None:
             logs.append((log, size))
         total += size
@@ -604,13 +745,11 @@ def show_logfile_usage(server, options):
             max_col = _get_formatted_max_width(logs, columns, 1)
             if max_col < len('size'):
                 max_col = len('size')
-            size = "{0:>{1}}".format('size', max_col)
+            size = 'size'.rjust(max_col)
             columns = ['log_name', size]
             for row in logs:
-                # Add commas
-                size = locale.format("%d", row[1], grouping=True)
-                # Make justified strings
-                size = "{0:>{1}}".format(size, max_col)
+                # Add commas and justify
+                size = _group_int(row[1]).rjust(max_col)
                 fmt_logs.append((row[0], size))
 
         else:
@@ -643,14 +782,12 @@ def _print_logs(logs, total, options):
         max_col = _get_formatted_max_width(logs, ('log_file', 'size'), 1)
         if max_col < len('size'):
             max_col = len('size')
-        size = "{0:>{1}}".format('size', max_col)
+        size = 'size'.rjust(max_col)
         columns.append(size)
 
         for row in logs:
-            # Add commas
-            size = locale.format("%d", row[1], grouping=True)
-            # Make justified strings
-            size = "{0:>{1}}".format(size, max_col)
+            # Add commas and justify
+            size = _group_int(row[1]).rjust(max_col)
             fmt_logs.append((row[0], size))
 
     else:
@@ -687,12 +824,16 @@ def show_log_usage(server, datadir, options):
     has_super = user_inst.has_privilege("*", "*", "SUPER")
     has_rpl_client = user_inst.has_privilege("*", "*", "REPLICATION CLIENT")
 
+    # Get all the required server variables at once.
+    variables = _get_server_variables(server, ['log_bin', 'log_bin_basename',
+                                               'relay_log_basename'])
+
     # Verify necessary permissions (access to filesystem) and privileges
     # (execute queries) to get logs usage information.
     if log_type == 'binary log':
         # Check for binlog ON first.
-        res = server.show_server_variable('log_bin')
-        if res and res[0][1].upper() == 'OFF':
+        log_bin = variables.get('log_bin')
+        if log_bin is not None and log_bin.upper() == 'OFF':
             print("# Binary logging is turned off on the server.")
             return True
         # Check required privileges according to the access to the datadir.
@@ -769,7 +910,7 @@ def show_log_usage(server, datadir, options):
             logs = server.exec_query("SHOW BINARY LOGS")
             if logs:
                 # Calculate total size.
-                total = sum([int(item[1]) for item in logs])
+                total = sum(int(item[1]) for item in logs)
             else:
                 print("# No binary logs data available.")
                 return True
@@ -780,10 +921,10 @@ def show_log_usage(server, datadir, options):
         # Note: as of 5.6.2, users can specify location of binlog and relaylog.
         if server.check_version_compat(5, 6, 2):
             if log_type == 'binary log':
-                res = server.show_server_variable("log_bin_basename")[0]
+                basename = variables.get('log_bin_basename') or ''
             else:
-                res = server.show_server_variable("relay_log_basename")[0]
-            log_path, log_prefix = os.path.split(res[1])
+                basename = variables.get('relay_log_basename') or ''
+            log_path, log_prefix = os.path.split(basename)
             # In case log_path and log_prefix are '' (not defined) set them
             # to the default value.
             if not log_path:
@@ -822,50 +963,60 @@ def show_innodb_usage(server, datadir, options):
     verbosity = options.get("verbosity", 0)
     quiet = options.get("quiet", False)
 
+    # Get all the required server variables at once.
+    variables = _get_server_variables(server, ['have_innodb',
+                                               'innodb_file_per_table',
+                                               'innodb_data_home_dir',
+                                               'innodb_data_file_path'])
+
     # Check to see if we have innodb
-    res = server.show_server_variable('have_innodb')
-    if res != [] and res[0][1].upper() in ("NO", "DISABLED"):
+    value = variables.get('have_innodb')
+    if value is not None and value.upper() in _INNODB_DISABLED:
         print("# InnoDB is disabled on this server.")
         return True
 
     # Modified check for version 5.5
-    res = server.exec_query("USE INFORMATION_SCHEMA")
     res = server.exec_query("SELECT engine, support "
                             "FROM INFORMATION_SCHEMA.ENGINES "
                             "WHERE engine='InnoDB'")
-    if res != [] and res[0][1].upper() == "NO":
+    if res and res[0][1].upper() in _INNODB_DISABLED:
         print("# InnoDB is disabled on this server.")
         return True
 
     # Check to see if innodb_file_per_table is ON
-    res = server.show_server_variable('innodb_file_per_table')
-    # pylint: disable=R0102
-    if res != [] and res[0][1].upper() == "ON":
-        innodb_file_per_table = True
-    else:
-        innodb_file_per_table = False
+    value = variables.get('innodb_file_per_table')
+    innodb_file_per_table = value is not None and value.upper() == "ON"
 
     # Get path
-    res = server.show_server_variable('innodb_data_home_dir')
-    if res != [] and len(res[0][1]) > 0:
-        innodb_dir = res[0][1]
+    value = variables.get('innodb_data_home_dir')
+    if value:
+        innodb_dir = value
     else:
         innodb_dir = datadir
 
+    datafree = None
     if not is_remote and os.access(innodb_dir, os.R_OK):
         if not quiet:
             print("# InnoDB tablespace information:")
 
-        res = server.show_server_variable('innodb_data_file_path')
-        tablespaces = []
-        if res != [] and len(res[0][1]) > 0:
-            parts = res[0][1].split(";")
-            for part in parts:
-                tablespaces.append(part)
+        value = variables.get('innodb_data_file_path')
+        tablespaces = value.split(";") if value else []
 
-        innodb, total = _build_innodb_list(innodb_file_per_table, innodb_dir,
-                                           datadir, tablespaces, verbosity)
-        if innodb == []:
+        # Query the free space while the files are read. The connection is
+        # only used by the pool thread until it is joined.
+        pool = None
+        if not innodb_file_per_table:
+            pool = ThreadPool(1)
+            datafree = pool.apply_async(server.exec_query, (_QUERY_DATAFREE,))
+            pool.close()
+        try:
+            innodb, total, max_size = _build_innodb_list(
+                innodb_file_per_table, innodb_dir, datadir, tablespaces,
+                verbosity)
+        finally:
+            if pool is not None:
+                pool.join()
+        if not innodb:
             raise UtilError("InnoDB is enabled but there is a problem "
                             "reading the tablespace files.")
 
@@ -873,29 +1024,12 @@ def show_innodb_usage(server, datadir, options):
         if verbosity > 0:
             columns.append('type')
             columns.append('specificaton')
-        size = 'size'
-        fmt_innodb = []
         if fmt.upper() == 'GRID':
-            max_col = _get_formatted_max_width(innodb, columns, 1)
-            if max_col < len('size'):
-                max_col = len('size')
-            size = "{0:>{1}}".format('size', max_col)
-            columns = ['innodb_file']
-            columns.append(size)
-            if verbosity > 0:
-                columns.append('type')
-                columns.append('specificaton')
-
-            for row in innodb:
-                # Add commas
-                size = locale.format("%d", row[1], grouping=True)
-                # Make justified strings
-                size = "{0:>{1}}".format(size, max_col)
-                if verbosity > 0:
-                    fmt_innodb.append((row[0], size, row[2], row[3]))
-                else:
-                    fmt_innodb.append((row[0], size))
-
+            max_col = max(len(_group_int(max_size)), len('size'))
+            columns[1] = 'size'.rjust(max_col)
+            # Add commas and justify the size, keeping any other columns.
+            fmt_innodb = [(row[0], _group_int(row[1]).rjust(max_col)) +
+                          row[2:] for row in innodb]
         else:
             fmt_innodb = innodb
 
@@ -906,13 +1040,14 @@ def show_innodb_usage(server, datadir, options):
 
         if verbosity > 0 and not innodb_file_per_table and not quiet:
             for tablespace in innodb:
-                if tablespace[1] != 'log file':
+                # Rows hold (name, size, type, specification).
+                if tablespace[2] != 'log file':
                     parts = tablespace[3].split(":")
                     if len(parts) > 2:
-                        ts_size = int(tablespace[1]) / _MB
-                        print("Tablespace %s can be " % tablespace[3] + \
-                              "extended by using %s:%sM[...]\n" % \
-                              (parts[0], ts_size))
+                        print("Tablespace {0} can be extended by using "
+                              "{1}:{2}M[...]\n".format(tablespace[3],
+                                                       parts[0],
+                                                       tablespace[1] / _MB))
     elif is_remote:
         print("# InnoDB data information not accessible from a remote host.")
     else:
@@ -920,8 +1055,11 @@ def show_innodb_usage(server, datadir, options):
               "Check your permissions.")
 
     if not innodb_file_per_table:
-        res = server.exec_query(_QUERY_DATAFREE)
-        if res != []:
+        if datafree is not None:
+            res = datafree.get()
+        else:
+            res = server.exec_query(_QUERY_DATAFREE)
+        if res:
             if len(res) > 1:
                 raise UtilError("Found multiple rows for freespace.")
             else:
@@ -20,12 +20,18 @@ This file contains the automatic failover console. It contains only the
 user interface code for the automatic failover feature for replication.
 """
 
+import codecs
+import io
 import logging
 import os
+import re
+import signal
 import sys
 import time
 import struct
 
+from collections import deque
+
 from mysql_utilities.exception import UtilRplError
 from mysql_utilities.common.format import format_tabular_list, print_list
 
@@ -35,6 +41,25 @@ _CONSOLE_FOOTER_NO_KEYBOARD = "Press CTRL+C to quit"
 
 _COMMAND_KEYS = {'\x1b[A': 'ARROW_UP', '\x1b[B': 'ARROW_DN'}
 
+# A key is either an escape sequence (e.g. an arrow key) or a single
+# character. An escape sequence at the end of the input may not be complete
+# yet (see FailoverConsole._read_keys).
+_KEYS_RE = re.compile(r'\x1b\[[0-9;]*[~A-Za-z]|[\s\S]')
+_PARTIAL_KEY_RE = re.compile(r'\x1b(\[[0-9;]*)?\Z')
+
+# ANSI escape sequence to move the cursor home, clear the screen and clear
+# the scrollback buffer (as done by the clear command).
+_CLEAR_SCREEN = "\x1b[H\x1b[2J\x1b[3J"
+# ANSI escape sequences to begin and end a synchronized update (terminals
+# display the whole frame at once, others ignore them).
+_BEGIN_UPDATE = "\x1b[?2026h"
+_END_UPDATE = "\x1b[?2026l"
+# ANSI escape sequences to replace a line, erase the screen below a line and
+# to move the cursor (row and column start at 1).
+_REPLACE_LINE = "\x1b[{0};1H\x1b[K{1}"
+_ERASE_BELOW = "\x1b[{0};1H\x1b[J"
+_MOVE_CURSOR = "\x1b[{0};{1}H"
+
 # Minimum number of rows needed to display screen
 _MINIMUM_ROWS = 15
 _HEALTH_LIST = "Replication Health Status"
@@ -52,44 +77,34 @@ _DATE_LEN = 22
 _DROP_FC_TABLE = "DROP TABLE IF EXISTS mysql.failover_console"
 _CREATE_FC_TABLE = ("CREATE TABLE IF NOT EXISTS mysql.failover_console "
                     "(host char(255), port char(10))")
-_SELECT_FC_TABLE = ("SELECT * FROM mysql.failover_console WHERE host = '%s' "
-                    "AND port = '%s'")
-_INSERT_FC_TABLE = "INSERT INTO mysql.failover_console VALUES ('%s', '%s')"
-_DELETE_FC_TABLE = ("DELETE FROM mysql.failover_console WHERE host = '%s' "
-                    "AND port = '%s'")
+_SELECT_FC_TABLE = ("SELECT * FROM mysql.failover_console WHERE host = %s "
+                    "AND port = %s")
+_INSERT_FC_TABLE = "INSERT INTO mysql.failover_console VALUES (%s, %s)"
+_DELETE_FC_TABLE = ("DELETE FROM mysql.failover_console WHERE host = %s "
+                    "AND port = %s")
+
+# Buffer for the TIOCGWINSZ ioctl (see get_terminal_size).
+_WINSIZE_BUFFER = struct.pack('HHHH', 0, 0, 0, 0)
 
 # Idle time (in seconds) for polling user input to avoid high CPU usage.
 _IDLE_TIME_INPUT_POLLING = 0.01  # 10 ms
 
+# Default maximum number of screen redraws per second.
+_MAX_FPS = 30
+
 # Try to import the windows getch() if it fails, we're on Posix so define
 # a custom getch() method to return keys.
 try:
     # Win32
     # pylint: disable=C0413
-    from msvcrt import getch, kbhit  # pylint: disable=F0401
+    from msvcrt import getwch as getch, kbhit  # pylint: disable=F0401
 except ImportError:
     # UNIX/Posix
     # pylint: disable=C0413, C0411
     import termios
+    import tty
     from select import select
 
-    def getch():
-        """Make a get character keyboard method for Posix machines.
-        """
-        fd = sys.stdin.fileno()
-        old = termios.tcgetattr(fd)
-        new = termios.tcgetattr(fd)
-        new[3] = new[3] & ~termios.ICANON & ~termios.ECHO
-        new[6][termios.VMIN] = 1
-        new[6][termios.VTIME] = 0
-        termios.tcsetattr(fd, termios.TCSANOW, new)
-        key = None
-        try:
-            key = os.read(fd, 4)
-        finally:
-            termios.tcsetattr(fd, termios.TCSAFLUSH, old)
-        return key
-
     def kbhit():
         """Make a keyboard hit method for Posix machines.
         """
@@ -113,8 +128,7 @@ def get_terminal_size():
             import fcntl
             import termios
             y, x = 0, 1
-            packed_info = fcntl.ioctl(0, termios.TIOCGWINSZ,
-                                      struct.pack('HHHH', 0, 0, 0, 0))
+            packed_info = fcntl.ioctl(0, termios.TIOCGWINSZ, _WINSIZE_BUFFER)
             wininfo = struct.unpack('HHHH', packed_info)
             return (wininfo[x], wininfo[y])
         else:
@@ -167,6 +181,8 @@ class FailoverConsole(object):
           interval          time in seconds for interval loop, default = 15
           failover_mode     failover mode (used for reporting only),
                             default = 'auto'
+          max_fps           maximum number of screen redraws per second,
+                            default = 30
         """
         self.interval = int(options.get("interval", 15))
         self.pingtime = options.get("pingtime", 3)
@@ -179,6 +195,7 @@ class FailoverConsole(object):
         self.no_keyboard = options.get("no_keyboard", False)
 
         self.alarm = time.time() + self.interval
+        self.next_interval = time.ctime(self.alarm)
         self.gtid_list = -1
         self.scroll_size = 0
         self.start_list = 0
@@ -192,6 +209,26 @@ class FailoverConsole(object):
         self.scroll_on = False
         self.old_mode = None
         self.master_gtids = []
+        # Last health data read and when (see _format_health_data)
+        self.health_data = None
+        self.health_time = 0.0
+
+        # Redraws requested less than min_redraw_time seconds after the
+        # last one are postponed (see _print_list).
+        self.min_redraw_time = 1.0 / options.get("max_fps", _MAX_FPS)
+        self.last_redraw = 0.0
+        self.redraw_pending = False
+        # Screen being drawn and lines of the screen last drawn, None if
+        # unknown (see _draw_frame).
+        self.frame = io.StringIO()
+        self.prev_frame = None
+
+        # Keys read but not processed yet, the start of an escape sequence
+        # still to be completed and the decoder of the keyboard input (see
+        # _read_keys).
+        self.keys = deque()
+        self.partial_key = ''
+        self.key_decoder = codecs.getincrementaldecoder("utf-8")("replace")
 
         # Dictionary that holds the current warning messages
         self.warnings_dic = {}
@@ -204,6 +241,34 @@ class FailoverConsole(object):
 
         self.report_mode = 'H'
 
+        # Commands by key (see _do_command)
+        self.commands = {}
+        for keys, command in (('rR', self._refresh),
+                              ('gG', self._show_gtid_data),
+                              ('hH', self._show_health_data),
+                              ('uU', self._show_uuid_data),
+                              ('lL', self._show_log_entries)):
+            for key in keys:
+                self.commands[key] = command
+
+        # Bottom menu options without and with the scroll commands
+        if self.no_keyboard:
+            # No support for keyboard, disable menu
+            self.footers = (_CONSOLE_FOOTER_NO_KEYBOARD,
+                            _CONSOLE_FOOTER_NO_KEYBOARD)
+        else:
+            footer = _CONSOLE_FOOTER
+            # If logging enabled, show command
+            if self.logging:
+                footer = "{0} L-log entries".format(footer)
+            self.footers = (footer, "{0} Up|Down-scroll".format(footer))
+
+        # While the console is displayed, the terminal size is only read
+        # again after the terminal is resized if SIGWINCH can be handled,
+        # otherwise it is read every time (see display_console).
+        self.terminal_size = None
+        self.watch_resize = False
+
         self._reset_screen_size()
 
     def register_instance(self, clear=False, register=True):
@@ -230,7 +295,9 @@ class FailoverConsole(object):
         # Turn binary log off first
         self.master.toggle_binlog("DISABLE")
 
-        host_port = (self.master.host, self.master.port)
+        # Host and port are passed as query parameters (port is a string
+        # column).
+        host_port = {'params': (self.master.host, str(self.master.port))}
         # Drop the table if specified
         if clear:
             self.master.exec_query(_DROP_FC_TABLE)
@@ -238,7 +305,7 @@ class FailoverConsole(object):
         # Register the console
         if register:
             res = self.master.exec_query(_CREATE_FC_TABLE)
-            res = self.master.exec_query(_SELECT_FC_TABLE % host_port)
+            res = self.master.exec_query(_SELECT_FC_TABLE, host_port)
             # COMMIT to close session before enabling binlog.
             self.master.commit()
             if res != []:
@@ -247,10 +314,10 @@ class FailoverConsole(object):
                 self.mode = 'fail'
             else:
                 # We're first! Yippee.
-                res = self.master.exec_query(_INSERT_FC_TABLE % host_port)
+                res = self.master.exec_query(_INSERT_FC_TABLE, host_port)
         # Unregister the console if our mode was changed
         elif self.old_mode != self.mode:
-            res = self.master.exec_query(_DELETE_FC_TABLE % host_port)
+            res = self.master.exec_query(_DELETE_FC_TABLE, host_port)
 
         # Turn binary log on
         self.master.toggle_binlog("ENABLE")
@@ -282,11 +349,22 @@ class FailoverConsole(object):
         """
         self.interval = interval
         self.alarm = self.interval + time.time()
+        # Text displayed in the header (see _print_header)
+        self.next_interval = time.ctime(self.alarm)
+        # Read the health data again for the new interval.
+        self.health_data = None
+
+    def _on_resize(self, signum, frame):
+        """Handle the terminal resize signal (SIGWINCH)
+        """
+        self.terminal_size = None
 
     def _reset_screen_size(self):
         """Recalculate the screen size
         """
-        self.max_cols, self.max_rows = get_terminal_size()
+        if self.terminal_size is None or not self.watch_resize:
+            self.terminal_size = get_terminal_size()
+        self.max_cols, self.max_rows = self.terminal_size
         if self.max_rows < _MINIMUM_ROWS:
             self.max_rows = _MINIMUM_ROWS
 
@@ -322,23 +400,33 @@ class FailoverConsole(object):
         else:
             return (_GEN_GTID_COLS, rows)
 
-    def _format_health_data(self):
+    def _format_health_data(self, force=False):
         """Get the formatted health data
 
         This method sets the member list_data to the health list to populate
         the list. A subsequent call to _print_list() displays the new
         list.
+
+        Unless forced, the health data is read at most once per half
+        interval, and again when a new interval starts.
+
+        force[in]       If True, always read the health data
         """
         # Get health information
         if self.get_health_data is not None:
-            try:
-                health_data = self.get_health_data()
-            except Exception as err:
-                raise UtilRplError("Cannot get health data: {0}".format(err))
+            now = time.time()
+            if force or self.health_data is None or \
+               now - self.health_time >= self.interval / 2.0:
+                try:
+                    self.health_data = self.get_health_data()
+                except Exception as err:
+                    raise UtilRplError("Cannot get health data: "
+                                       "{0}".format(err))
+                self.health_time = now
             self.start_list = 0
-            self.end_list = len(health_data[1])
+            self.end_list = len(self.health_data[1])
             self.report_mode = 'H'
-            return health_data
+            return self.health_data
 
         return ([], [])
 
@@ -375,11 +463,10 @@ class FailoverConsole(object):
         cols = ["Date", "Entry"]
         if self.logging and self.log_file is not None:
             self.comment = _LOG_LIST
-            log = open(self.log_file, "r")
-            for row in log.readlines():
-                rows.append(
-                    (row[0:_DATE_LEN], row[_DATE_LEN + 1:].strip('\n')))
-            log.close()
+            # Iterate over the file instead of reading all its lines first.
+            with open(self.log_file, "r") as log:
+                rows = [(row[:_DATE_LEN], row[_DATE_LEN + 1:].rstrip('\n'))
+                        for row in log]
             self.start_list = 0
             self.end_list = len(rows)
 
@@ -400,33 +487,43 @@ class FailoverConsole(object):
                        Note: Invalid keys are ignored.
         """
         # We check for screen resize here
-        self.max_cols, self.max_rows = get_terminal_size()
+        self._reset_screen_size()
 
         # Reset the GTID list counter
-        if key not in ['g', 'G']:
+        if key not in ('g', 'G'):
             self.gtid_list = -1
 
-        # Refresh
-        if key in ['r', 'R']:
-            self._refresh()
-        # Show GTIDs
-        elif key in ['g', 'G']:
-            self.list_data = self._format_gtid_data()
-            self._print_list()
-        # Show health report
-        elif key in ['h', 'H']:
-            self.list_data = self._format_health_data()
-            self._print_list()
-        elif key in ['u', 'U']:
-            self.list_data = self._format_uuid_data()
-            self._print_list()
-        elif key in ['l', 'L']:
-            if self.logging:
-                self.list_data = self._format_log_entries()
-                self._print_list()
+        command = self.commands.get(key)
+        if command is not None:
+            command()
         elif key in _COMMAND_KEYS:
             self._scroll(key)
 
+    def _show_gtid_data(self):
+        """Show the next GTID list
+        """
+        self.list_data = self._format_gtid_data()
+        self._print_list()
+
+    def _show_health_data(self):
+        """Show the health report
+        """
+        self.list_data = self._format_health_data()
+        self._print_list()
+
+    def _show_uuid_data(self):
+        """Show the UUIDs
+        """
+        self.list_data = self._format_uuid_data()
+        self._print_list()
+
+    def _show_log_entries(self):
+        """Show the log entries (if logging is on)
+        """
+        if self.logging:
+            self.list_data = self._format_log_entries()
+            self._print_list()
+
     def _wait_for_interval(self):
         """Wait for the time interval to expire
 
@@ -435,37 +532,60 @@ class FailoverConsole(object):
         other keyboard requests to the _do_command() method for processing.
 
         If the interval expires, the method returns None.
-        If the user presses a key, the method returns the numeric key number.
+        If the user presses a key, the method returns the key.
 
-        Returns - None or int (see above)
+        Returns - None or string (see above)
         """
-        # If on *nix systems, set the terminal IO sys to not echo
-        if not self.no_keyboard and os.name == "posix":
-            import tty
-            import termios
-            old_settings = termios.tcgetattr(sys.stdin)
-            tty.setcbreak(sys.stdin.fileno())
-
         key = None
-        done = False
-        try:
+        if os.name == "posix":
+            # Sleep until the interval expires or a key is pressed.
+            while not self.keys:
+                timeout = max(0, self.alarm - time.time())
+                if self.no_keyboard:
+                    time.sleep(timeout)
+                    return None
+                if not select([sys.stdin], [], [], timeout)[0]:
+                    return None
+                self._read_keys()
+            key = self.keys.popleft()
+        else:
+            done = False
             # Loop for interval in seconds while detecting keypress
             while not done:
                 done = self.alarm <= time.time()
                 if not self.no_keyboard and kbhit() and not done:
                     key = getch()
                     done = True
-                if os.name != "posix":
-                    # On Windows wait a few ms to avoid 100% CPU usage for
-                    # polling input (handled in kbhit() for posix systems).
-                    time.sleep(_IDLE_TIME_INPUT_POLLING)
-        finally:
-            # Ensure terminal IO sys is reset to older state.
-            if not self.no_keyboard and os.name == "posix":
-                termios.tcsetattr(sys.stdin, termios.TCSADRAIN, old_settings)
+                # Wait a few ms to avoid 100% CPU usage for polling input.
+                time.sleep(_IDLE_TIME_INPUT_POLLING)
 
         return key
 
+    def _read_keys(self):
+        """Read the pending keyboard input (Posix only)
+
+        This method reads all the input available and splits it into keys,
+        which are queued in keys. An escape sequence cut at the end of the
+        input is kept and completed by the next read. If the end of the
+        input is reached, the keyboard is no longer read (as with the
+        no_keyboard option) and the console keeps running.
+
+        Note: the terminal must be in cbreak mode (see display_console).
+        """
+        data = os.read(sys.stdin.fileno(), 1024)
+        if not data:
+            self.no_keyboard = True
+            self.partial_key = ''
+            return
+        text = self.partial_key + self.key_decoder.decode(data)
+        match = _PARTIAL_KEY_RE.search(text)
+        if match:
+            self.partial_key = text[match.start():]
+            text = text[:match.start()]
+        else:
+            self.partial_key = ''
+        self.keys.extend(_KEYS_RE.findall(text))
+
     def clear(self):
         """Clear the screen
 
@@ -473,25 +593,29 @@ class FailoverConsole(object):
         a clear of the console.
         """
         if os.name == "posix":
-            os.system("clear")
+            # Write the escape sequence instead of running the clear command.
+            sys.stdout.write(_CLEAR_SCREEN)
+            sys.stdout.flush()
         else:
             os.system("cls")
         self.rows_printed = 0
+        self.prev_frame = None
 
     def _print_header(self):
         """Display header
         """
-        print(_CONSOLE_HEADER)
-        next_interval = time.ctime(self.alarm)
-        print("Failover Mode =", self.mode, "    Next Interval =", \
-            next_interval)
+        print(_CONSOLE_HEADER, file=self.frame)
+        print("Failover Mode =", self.mode, "    Next Interval =",
+              self.next_interval, file=self.frame)
         if self.old_mode is not None and self.old_mode != self.mode:
-            print()
-            print("NOTICE: Failover mode changed to fail due to another")
-            print("        instance of the console running against master.")
+            print(file=self.frame)
+            print("NOTICE: Failover mode changed to fail due to another",
+                  file=self.frame)
+            print("        instance of the console running against master.",
+                  file=self.frame)
             self.rows_printed += 2
             self.max_rows -= 3
-        print()
+        print(file=self.frame)
         self.rows_printed += 4
 
     def _print_master_status(self):
@@ -510,8 +634,8 @@ class FailoverConsole(object):
                              "".format(status[0], status[1]))
         except Exception as err:
             raise UtilRplError("Cannot get master status: {0}".format(err))
-        print("Master Information")
-        print("------------------")
+        print("Master Information", file=self.frame)
+        print("------------------", file=self.frame)
         cols = ("Binary Log File", "Position",
                 "Binlog_Do_DB", "Binlog_Ignore_DB")
         fmt_opts = {
@@ -520,9 +644,9 @@ class FailoverConsole(object):
             "quiet": True,
             "print_footer": False,
         }
-        logfile = status[0][0:20] if len(status[0]) > 20 else status[0]
-        rows = [(logfile, status[1], status[2], status[3])]
-        format_tabular_list(sys.stdout, cols, rows, fmt_opts)
+        # Show at most 20 characters of the binary log file name.
+        rows = [(status[0][:20], status[1], status[2], status[3])]
+        format_tabular_list(self.frame, cols, rows, fmt_opts)
 
         # Display gtid executed set
         self.master_gtids = []
@@ -531,16 +655,16 @@ class FailoverConsole(object):
                 # Add each GTID to a tuple to match the required format to
                 # print the full GRID list correctly.
                 self.master_gtids.append((gtid.strip(","),))
-        print("\nGTID Executed Set")
+        print("\nGTID Executed Set", file=self.frame)
         try:
-            print(self.master_gtids[0][0], end=' ')
+            print(self.master_gtids[0][0], end=' ', file=self.frame)
         except IndexError:
-            print("None", end=' ')
+            print("None", end=' ', file=self.frame)
         if len(self.master_gtids) > 1:
-            print("[...]")
+            print("[...]", file=self.frame)
         else:
-            print()
-        print()
+            print(file=self.frame)
+        print(file=self.frame)
         self.rows_printed += 7
 
     def _print_warnings(self):
@@ -551,7 +675,7 @@ class FailoverConsole(object):
         # Only do something if warnings exist.
         if self.warnings_dic:
             for msg in self.warnings_dic.values():
-                print(("WARNING: {0}".format(msg)))
+                print("WARNING: {0}".format(msg), file=self.frame)
                 self.rows_printed += 1
 
     def add_warning(self, warning_key, warning_msg):
@@ -591,11 +715,12 @@ class FailoverConsole(object):
             else:
                 return  # Cannot scroll up any further
         elif _COMMAND_KEYS[key] == 'ARROW_DN':
-            if self.end_list < len(self.list_data[1]):
+            num_rows = len(self.list_data[1])
+            if self.end_list < num_rows:
                 self.start_list = self.end_list
                 self.end_list += self.scroll_size
-                if self.end_list > len(self.list_data[1]):
-                    self.end_list = len(self.list_data[1])
+                if self.end_list > num_rows:
+                    self.end_list = num_rows
             else:
                 return  # Cannot scroll down any further
         else:
@@ -615,41 +740,47 @@ class FailoverConsole(object):
             return
 
         if refresh:
-            self.clear()
+            # Limit the redraw rate: postpone the redraw if the screen was
+            # just drawn. Several postponed redraws (e.g. while scrolling)
+            # result in a single one (see display_console).
+            if time.time() - self.last_redraw < self.min_redraw_time:
+                self.redraw_pending = True
+                return
+            self._start_redraw()
             self._print_header()
             self._print_master_status()
+            self._print_list(False, comment)
+            self._print_footer(self.scroll_on)
+            self._draw_frame()
+            return
 
         # Print list name
         if comment is None:
             comment = self.comment
-        print(comment)
+        print(comment, file=self.frame)
         self.rows_printed += 1
 
         # Print the list in the remaining space
+        columns, data = self.list_data
         footer_len = 2
         remaining_rows = self.max_rows - self.rows_printed - 4 - footer_len
-        if len(self.list_data[1][self.start_list:self.end_list]) > \
+        # Count the rows in view without copying them (a range is sliced
+        # like the list).
+        if len(range(len(data))[self.start_list:self.end_list]) > \
            remaining_rows:
-            rows = self.list_data[1][self.start_list:self.start_list +
-                                     remaining_rows]
             self.end_list = self.start_list + remaining_rows
             self.scroll_on = True
-        else:
-            if len(self.list_data[1]) == self.end_list and \
-               self.start_list == 0:
-                self.scroll_on = False
-            rows = self.list_data[1][self.start_list:self.end_list]
-        if len(rows) > 0:
+        elif len(data) == self.end_list and self.start_list == 0:
+            self.scroll_on = False
+        rows = data[self.start_list:self.end_list]
+        if rows:
             self.scroll_size = len(rows)
-            print_list(sys.stdout, 'GRID', self.list_data[0], rows)
+            print_list(self.frame, 'GRID', columns, rows)
             self.rows_printed += self.scroll_size + 4
         else:
-            print("0 Rows Found.")
+            print("0 Rows Found.", file=self.frame)
             self.rows_printed += 1
 
-        if refresh:
-            self._print_footer(self.scroll_on)
-
     def _print_footer(self, scroll=False):
         """Print the footer
 
@@ -659,62 +790,115 @@ class FailoverConsole(object):
         scroll[in]     if True, display scroll commands
         """
         # Print blank lines fill screen
-        i = self.rows_printed
-        while i < self.max_rows - 2:
-            print()
-            i += 1
+        self.frame.write("\n" * max(0, self.max_rows - 2 - self.rows_printed))
         # Show bottom menu options
-        footer = []
-        if self.no_keyboard:
-            # No support for keyboard, disable menu
-            footer.append(_CONSOLE_FOOTER_NO_KEYBOARD)
-        else:
-            footer.append(_CONSOLE_FOOTER)
-            # If logging enabled, show command
-            if self.logging:
-                footer.append("L-log entries")
-            if scroll:
-                footer.append("Up|Down-scroll")
-        print((" ".join(footer)))
+        print(self.footers[1 if scroll else 0], file=self.frame)
         self.rows_printed = self.max_rows
 
-    def _refresh(self):
+    def _refresh(self, force=True):
         """Refresh the console
 
         This method redraws the console resetting screen size if the
         command/terminal window was resized since last action.
+
+        force[in]       If True, read the health data again if displayed
         """
-        self.clear()
+        self._start_redraw()
         self._reset_screen_size()
         self._print_header()
         self._print_master_status()
         self._print_warnings()
         # refresh health if already displayed
         if self.report_mode == 'H':
-            self.list_data = self._format_health_data()
+            self.list_data = self._format_health_data(force)
         self._print_list(False)
         self._print_footer(self.scroll_on)
+        # Other output may have been written since the last redraw, so
+        # redraw the whole screen.
+        self._draw_frame(full=True)
+
+    def _draw_frame(self, full=False):
+        """Write the frame buffer to the terminal
+
+        On POSIX systems, only the lines that changed since the previous frame
+        are written, if the new frame fits the screen (i.e. no line scrolls or
+        wraps). Otherwise, the screen is cleared and the whole frame written.
+        The output is written with a single write() call, as a synchronized
+        update.
+
+        full[in]       if True, always clear and write the whole screen
+        """
+        frame = self.frame.getvalue()
+        lines = frame.split("\n")
+        prev = self.prev_frame
+        if os.name != "posix":
+            self.clear()
+            sys.stdout.write(frame)
+        elif full or prev is None or len(lines) > self.max_rows or \
+                max(len(line) for line in lines) > self.max_cols:
+            sys.stdout.write("".join((_BEGIN_UPDATE, _CLEAR_SCREEN, frame,
+                                      _END_UPDATE)))
+        else:
+            out = [_BEGIN_UPDATE]
+            out.extend(_REPLACE_LINE.format(i + 1, line)
+                       for i, line in enumerate(lines)
+                       if i >= len(prev) or line != prev[i])
+            if len(prev) > len(lines):
+                out.append(_ERASE_BELOW.format(len(lines) + 1))
+            # Leave the cursor where writing the whole frame would.
+            out.append(_MOVE_CURSOR.format(len(lines), len(lines[-1]) + 1))
+            out.append(_END_UPDATE)
+            sys.stdout.write("".join(out))
+        sys.stdout.flush()
+        self.prev_frame = lines
+
+    def _start_redraw(self):
+        """Start a full screen redraw
+
+        The screen is printed to the frame buffer and written to the terminal
+        at once by _draw_frame().
+        """
+        self.last_redraw = time.time()
+        self.redraw_pending = False
+        self.frame = io.StringIO()
+        self.rows_printed = 0
+
+    def _draw_pending(self):
+        """Do the postponed redraw, if any
+
+        The redraw is skipped if more keys are waiting to be processed,
+        since they will request a new redraw. Otherwise, it waits for the
+        minimum time between redraws and redraws the list.
+        """
+        if not self.redraw_pending:
+            return
+        if self.keys or (not self.no_keyboard and kbhit()):
+            return
+        delay = self.last_redraw + self.min_redraw_time - time.time()
+        if delay > 0:
+            time.sleep(delay)
+        self._print_list()
 
     def _reconnect_master(self, pingtime=3):
         """Tries to reconnect to the master
 
         This method tries to reconnect to the master and if connection fails
-        after 3 attemps, returns False.
+        after 3 attemps, returns False. The wait between attempts starts at 1
+        second and doubles after each attempt, up to pingtime seconds.
         """
         if self.master and self.master.is_alive():
             return True
-        is_connected = False
-        i = 0
-        while i < 3:
+        delay = min(1, pingtime)
+        for attempt in range(3):
+            if attempt:
+                time.sleep(delay)
+                delay = min(delay * 2, pingtime)
             try:
                 self.master.connect()
-                is_connected = True
-                break
+                return True
             except:
                 pass
-            time.sleep(pingtime)
-            i += 1
-        return is_connected
+        return False
 
     def display_console(self):
         """Display the failover console
@@ -728,21 +912,60 @@ class FailoverConsole(object):
 
         Returns bool - True = user exit no errors, False = errors
         """
+        # If on *nix systems, set the terminal IO sys to not echo and to
+        # read each key without waiting for a new line, once for the whole
+        # interval.
+        old_settings = None
+        if not self.no_keyboard and os.name == "posix":
+            old_settings = termios.tcgetattr(sys.stdin)
+            tty.setcbreak(sys.stdin.fileno())
+        # Handle the terminal resize signal while the console is displayed.
+        # The terminal may have been resized since the last display.
+        old_handler = None
+        self.terminal_size = None
+        if hasattr(signal, "SIGWINCH"):
+            try:
+                old_handler = signal.getsignal(signal.SIGWINCH)
+                signal.signal(signal.SIGWINCH, self._on_resize)
+                self.watch_resize = True
+            except ValueError:
+                pass  # Not in the main thread.
+        try:
+            return self._run_console()
+        finally:
+            # Ensure terminal IO sys is reset to older state.
+            if old_settings is not None:
+                termios.tcsetattr(sys.stdin, termios.TCSADRAIN, old_settings)
+            # Restore the previous resize signal handler.
+            if self.watch_resize:
+                self.watch_resize = False
+                if old_handler is None:
+                    # Handler not installed from Python, use the default.
+                    old_handler = signal.SIG_DFL
+                signal.signal(signal.SIGWINCH, old_handler)
+
+    def _run_console(self):
+        """Run the failover console until the interval expires
+
+        Returns bool - True = user exit no errors, False = errors, None =
+                       interval expired (see display_console)
+        """
         self._reset_interval(self.interval)
 
         # Get the data for first printing of the screen
         if self.list_data is None:
-            self.list_data = self.get_health_data()
-            self.start_list = 0
-            self.end_list = len(self.list_data[1])
+            self.list_data = self._format_health_data()
             self.gtid_list = -1   # Reset the GTID list counter
 
-        # Draw the screen
-        self._refresh()
+        # Draw the screen. No need to force reading the health data, it is
+        # read again for each new interval.
+        self._refresh(force=False)
 
         # Wait for a key press or the interval to expire
         done = False
         while not done:
+            # Draw the screen if the last redraw was postponed
+            self._draw_pending()
             # Disconnect the master while waiting for the interval to expire
             self.master.disconnect()
             # Wait for the interval to expire
@@ -134,9 +134,9 @@ class UtilitiesConsole(Console):
         new_cmd = ''  # blank string means no matches
 
         find_cmd = prefix
-        if len(prefix) >= 5 and prefix[0:5] != 'mysql':
+        if len(prefix) >= 5 and not prefix.startswith('mysql'):
             find_cmd = 'mysql' + find_cmd
-        matches = self.utils.get_util_matches(find_cmd)
+        matches = self._get_tab_matches(self.utils.get_util_matches, find_cmd)
         if self.tab_count == 2:
             self.utils.show_utilities(matches)
             self.cmd_line.display_command()
@@ -145,7 +145,7 @@ class UtilitiesConsole(Console):
         elif len(matches) == 1:
             new_cmd = matches[0]['name'] + ' '
             start = len(prefix)
-            if prefix[0:5] != 'mysql':
+            if not prefix.startswith('mysql'):
                 start += 5
             self.cmd_line.add(new_cmd[start:])
             self.tab_count = 0
@@ -179,7 +179,7 @@ class UtilitiesConsole(Console):
         util_name = full_command[0:i]
 
         # get utility information
-        utils = self.utils.get_util_matches(util_name)
+        utils = self._get_tab_matches(self.utils.get_util_matches, util_name)
         if len(utils) <= 0:
             return ''  # No option found because util does not exist.
 
@@ -194,7 +194,7 @@ class UtilitiesConsole(Console):
         if len(command_text) == 0:
             option_loc = 0
         # check for - or --
-        elif command_text[0:2] == '--':
+        elif command_text.startswith('--'):
             option_loc = 2
         elif command_text[0] == '-':
             option_loc = 1
@@ -268,78 +268,78 @@ class UtilitiesConsole(Console):
         if not command.lower().startswith('mysql'):
             command = 'mysql' + command
         # look in to the collected utilities
-        for util_info in self.utils.util_list:
-            if util_info["name"] == command:
-                # Get the command used to obtain the help from the utility
-                cmd = list(util_info["cmd"])
-                cmd.extend(parameters)
-
-                # Add quotes for Windows
-                if (os.name == "nt"):
-                    # If there is a space in the command, quote it!
-                    if (" " in cmd[0]):
-                        cmd[0] = '"{0}"'.format(cmd[0])
-                    # if cmd is freeze code utility, subprocess just need the
-                    # executable part not absolute path using shell=False or
-                    # Windows will complain about the path. The base path of
-                    # mysqluc is used as location dir base of the subprocess.
-                    if '.exe' in cmd[0]:
-                        _, ut_cmd = os.path.split(cmd[0])
-                        cmd[0] = ut_cmd.replace('"', '')
-                    # If the second part has .py in it and spaces, quote it!
-                    if len(cmd) > 1 and (" " in cmd[1]) and ('.py' in cmd[0]):
-                        cmd[1] = '"{0}"'.format(cmd[1])
-
-                if self.quiet:
-                    proc = subprocess.Popen(cmd, shell=False,
-                                            stdout=self.f_out,
-                                            stderr=self.f_out)
-                else:
-                    proc = subprocess.Popen(cmd, shell=False,
-                                            stderr=subprocess.PIPE)
-                    print()
-
-                # check the output for errors
-                _, stderr_temp = proc.communicate()
-                return_code = proc.returncode
-                err_msg = ("\nThe console has detected that the utility '{0}' "
-                           "ended with an error code.\nYou can get more "
-                           "information about the error by running the console"
-                           " command 'show last error'.").format(command)
-                if not self.quiet and return_code and stderr_temp:
-                    print(err_msg)
-                    if parameters:
-                        msg = ("\nExecution of utility: '{0} {1}' ended with "
-                               "return code '{2}' and with the following "
-                               "error message:\n"
-                               "{3}").format(command, ' '.join(parameters),
-                                             return_code, stderr_temp)
-                    else:
-                        msg = ("\nExecution of utility: '{0}' ended with "
-                               "return code '{1}' and with the following "
-                               "error message:\n{2}").format(command,
-                                                             return_code,
-                                                             stderr_temp)
-                    self.errors.append(msg)
-                elif not self.quiet and return_code:
-                    if parameters:
-                        msg = ("\nExecution of utility: '{0} {1}' ended with "
-                               "return code '{2}' but no error message was "
-                               "streamed to the standard error, please review "
-                               "the output from its execution."
-                               "").format(command, ' '.join(parameters),
-                                          return_code)
-                    else:
-                        msg = ("\nExecution of utility: '{0}' ended with "
-                               "return code '{1}' but no error message was "
-                               "streamed to the standard error, please review "
-                               "the output from its execution."
-                               "").format(command, return_code)
-                    print(msg)
-                return
-        # if got here, is because the utility was not found.
-        raise UtilError("The utility {0} is not accessible (from the path: "
-                        "{1}).".format(command, self.path))
+        util_info = self.utils.util_info_dict.get(command)
+        if util_info is None:
+            # the utility was not found.
+            raise UtilError("The utility {0} is not accessible (from the "
+                            "path: {1}).".format(command, self.path))
+
+        # Get the command used to obtain the help from the utility
+        cmd = list(util_info["cmd"])
+        cmd.extend(parameters)
+
+        # Add quotes for Windows
+        if (os.name == "nt"):
+            # If there is a space in the command, quote it!
+            if (" " in cmd[0]):
+                cmd[0] = '"{0}"'.format(cmd[0])
+            # if cmd is freeze code utility, subprocess just need the
+            # executable part not absolute path using shell=False or
+            # Windows will complain about the path. The base path of
+            # mysqluc is used as location dir base of the subprocess.
+            if '.exe' in cmd[0]:
+                _, ut_cmd = os.path.split(cmd[0])
+                cmd[0] = ut_cmd.replace('"', '')
+            # If the second part has .py in it and spaces, quote it!
+            if len(cmd) > 1 and (" " in cmd[1]) and ('.py' in cmd[0]):
+                cmd[1] = '"{0}"'.format(cmd[1])
+
+        if self.quiet:
+            proc = subprocess.Popen(cmd, shell=False,
+                                    stdout=self.f_out,
+                                    stderr=self.f_out)
+        else:
+            proc = subprocess.Popen(cmd, shell=False,
+                                    stderr=subprocess.PIPE)
+            print()
+
+        # check the output for errors
+        _, stderr_temp = proc.communicate()
+        return_code = proc.returncode
+        err_msg = ("\nThe console has detected that the utility '{0}' "
+                   "ended with an error code.\nYou can get more "
+                   "information about the error by running the console"
+                   " command 'show last error'.").format(command)
+        if not self.quiet and return_code and stderr_temp:
+            print(err_msg)
+            if parameters:
+                msg = ("\nExecution of utility: '{0} {1}' ended with "
+                       "return code '{2}' and with the following "
+                       "error message:\n"
+                       "{3}").format(command, ' '.join(parameters),
+                                     return_code, stderr_temp)
+            else:
+                msg = ("\nExecution of utility: '{0}' ended with "
+                       "return code '{1}' and with the following "
+                       "error message:\n{2}").format(command,
+                                                     return_code,
+                                                     stderr_temp)
+            self.errors.append(msg)
+        elif not self.quiet and return_code:
+            if parameters:
+                msg = ("\nExecution of utility: '{0} {1}' ended with "
+                       "return code '{2}' but no error message was "
+                       "streamed to the standard error, please review "
+                       "the output from its execution."
+                       "").format(command, ' '.join(parameters),
+                                  return_code)
+            else:
+                msg = ("\nExecution of utility: '{0}' ended with "
+                       "return code '{1}' but no error message was "
+                       "streamed to the standard error, please review "
+                       "the output from its execution."
+                       "").format(command, return_code)
+            print(msg)
 
     def show_custom_options(self):
         """Show all of the options for the mysqluc utility.
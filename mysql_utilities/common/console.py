@@ -19,10 +19,15 @@
 This module contains classes and functions used to manage a console utility.
 """
 
+import codecs
 import os
+import re
 import sys
 import shlex
 
+from bisect import bisect_left
+from collections import deque
+
 from mysql_utilities.common.format import print_dictionary_list
 from mysql_utilities.common.variables import Variables
 from mysql_utilities.exception import UtilError
@@ -31,10 +36,26 @@ _COMMAND_COMPLETE = 0
 _OPTION_COMPLETE = 1
 _VARIABLE_COMPLETE = 2
 
-# TODO remove this pylint disable regarding duplicate keys
-# pylint: disable=W0109
+# Commands that exit the console.
+_EXIT_COMMANDS = frozenset(('exit', 'quit'))
+
+# Command keys that end the command entry.
+_ENTER_KEYS = frozenset(('ENTER_POSIX', 'ENTER_WIN'))
+
+# A user-defined variable is a '$' followed by its name up to the next space.
+_VARIABLE_RE = re.compile(r'\$([^ ]+)')
+
+# A command token is a run of unquoted text and quoted strings without
+# whitespace (as defined by shlex) between them, e.g.
+# --server="root:pass@host". Any other character (backslash or unbalanced
+# quote) is matched by the last group and the command is then left to shlex.
+_TOKEN_RE = re.compile(r'(?:[^ \t\r\n\'"\\]+|"[^"\\]*"|\'[^\']*\')+'
+                       r'|([^ \t\r\n])')
+_QUOTED_RE = re.compile(r'"[^"]*"|\'[^\']*\'')
+
+# Command keys sent by the terminal. The backspace key sends DEL on POSIX
+# terminals and BS on Windows.
 _COMMAND_KEY = {
-    '\x7f': 'DELETE_POSIX',
     '\x1b[3~': 'DELETE_MAC',
     '\x0a': 'ENTER_POSIX',
     '\r': 'ENTER_WIN',
@@ -44,12 +65,25 @@ _COMMAND_KEY = {
     '\x1b[C': 'ARROW_RT',
     '\x1b[D': 'ARROW_LT',
     '\t': 'TAB',
-    '\x7f': 'BACKSPACE_POSIX',
+    '\x7f': 'BACKSPACE',
     '\xe0': 'SPECIAL_WIN',
-    '\x08': 'BACKSPACE_WIN',
+    '\x08': 'BACKSPACE',
     '\x1bOH': 'HOME',
     '\x1bOF': 'END'
 }
+# Only Windows sends the SPECIAL_WIN prefix; elsewhere it is a plain key.
+if os.name == 'posix':
+    del _COMMAND_KEY['\xe0']
+
+# Splits the input read from the terminal into escape sequences, command
+# keys (longest sequences first) and runs of any other characters. Escape
+# sequences that are not command keys (e.g. PageUp) are ignored.
+_ESCAPE_SEQUENCE_RE = r'\x1b(?:\[[0-9;]*[~A-Za-z]|O[A-Za-z])'
+_KEYS_RE = re.compile('|'.join(
+    [_ESCAPE_SEQUENCE_RE] +
+    [re.escape(key) for key in sorted(_COMMAND_KEY, key=len, reverse=True)] +
+    ['[^{0}]+'.format(re.escape(''.join(set(key[0] for key in _COMMAND_KEY))))]
+))
 
 # Some windows keys are different and require reading two keys.
 # The following are the second characters.
@@ -63,10 +97,6 @@ _WIN_COMMAND_KEY = {
     'O': 'END'
 }
 
-_COMMAND_COMPLETE = 0
-_OPTION_COMPLETE = 1
-_VARIABLE_COMPLETE = 2
-
 # Base commands for all consoles.
 #
 # The list includes a tuple for each command that contains the name of the
@@ -115,35 +145,98 @@ _BASE_COMMANDS = [
 try:
     # Win32
     # pylint: disable=C0413
-    from msvcrt import getch  # pylint: disable=F0401
+    from msvcrt import getwch as getch  # pylint: disable=F0401
 except ImportError:
     # UNIX/Posix
     # pylint: disable=C0411,C0413
     import termios
 
-    def getch():
-        """getch function
+    # Decoder of the terminal input, keeps the bytes of a character split
+    # between two reads.
+    _KEY_DECODER = codecs.getincrementaldecoder('utf-8')('replace')
+
+    def set_key_mode(fd):
+        """Set the terminal to return each key without echo or waiting for
+        a new line.
+
+        fd[in]             File descriptor of the terminal
+
+        Returns list - terminal attributes to restore afterwards
         """
-        fd = sys.stdin.fileno()
         old = termios.tcgetattr(fd)
         new = termios.tcgetattr(fd)
         new[3] = new[3] & ~termios.ICANON & ~termios.ECHO
         new[6][termios.VMIN] = 1
         new[6][termios.VTIME] = 0
         termios.tcsetattr(fd, termios.TCSANOW, new)
-        key = None
-        try:
-            key = os.read(fd, 80)
-        finally:
-            termios.tcsetattr(fd, termios.TCSAFLUSH, old)
-        return key
+        return old
+
+    def getch():
+        """getch function
+
+        Note: the terminal must be in key mode (see get_user_command).
+
+        Returns string - characters read or None at the end of the input
+        """
+        data = os.read(sys.stdin.fileno(), 4096)
+        if not data:
+            return None
+        return _KEY_DECODER.decode(data)
+
+
+def _unquote(match):
+    """Return the text of a quoted string matched by _QUOTED_RE.
+    """
+    return match.group(0)[1:-1]
+
+
+def _split_command(cmd_string):
+    """Split a command into tokens using shell-like syntax.
+
+    This method gives the same result as shlex.split() but uses a regular
+    expression for the common case of commands without escape characters.
+
+    cmd_string[in]     Command
+
+    Returns list - tokens of the command
+    """
+    tokens = []
+    for match in _TOKEN_RE.finditer(cmd_string):
+        if match.group(1) is not None:
+            return shlex.split(cmd_string)
+        token = match.group(0)
+        if '"' in token or "'" in token:
+            token = _QUOTED_RE.sub(_unquote, token)
+        tokens.append(token)
+    return tokens
+
+
+def _iter_commands(commands):
+    """Iterate over the commands of a semicolon separated list.
+
+    The commands are found one at a time so a list that ends early (e.g. on
+    exit) is not split beyond that point.
+
+    commands[in]       Semicolon separated list of commands
+
+    Returns iterator - each command of the list
+    """
+    start = 0
+    while True:
+        end = commands.find(';', start)
+        if end < 0:
+            yield commands[start:]
+            return
+        yield commands[start:end]
+        start = end + 1
 
 
 class _CommandHistory(object):
     """
     The _CommandHistory class encapsulates a list of commands that can be
     retrieved either via the previous or next command in the list. The
-    list grows to a circular list of max size as specified at initialization.
+    list is a ring buffer of max size as specified at initialization; once
+    full, adding a command discards the oldest one.
     """
 
     def __init__(self, options=None):
@@ -154,35 +247,27 @@ class _CommandHistory(object):
         if options is None:
             options = {}
         self.position = 0
-        self.commands = []
         self.max_size = options.get('max_size', 40)
+        self.commands = deque(maxlen=self.max_size)
 
     def add(self, command):
         """Add a command to the history list
 
-        This method appends the command list if the max size is not met or
-        replaces the last entry if the max size has been met.
+        This method appends the command to the list, discarding the oldest
+        entry if the max size has been met, and places the position just
+        past the newest entry so previous() returns it.
         """
-        if len(self.commands) < self.max_size:
-            self.commands.append(command)
-            self.position = 0
-        else:
-            if self.position == 0:
-                self.commands[self.max_size - 1] = command
-            else:
-                self.commands[self.position - 1] = command
+        self.commands.append(command)
+        self.position = len(self.commands)
 
     def __next__(self):
         """Get next command in list.
 
         Returns string next command
         """
-        if len(self.commands) == 0:
+        if not self.commands:
             return ''
-        if self.position == len(self.commands) - 1:
-            self.position = 0
-        else:
-            self.position += 1
+        self.position = (self.position + 1) % len(self.commands)
         return self.commands[self.position]
 
     def previous(self):
@@ -190,12 +275,9 @@ class _CommandHistory(object):
 
         Returns string prev command
         """
-        if len(self.commands) == 0:
+        if not self.commands:
             return ''
-        if self.position == 0:
-            self.position = len(self.commands) - 1
-        else:
-            self.position -= 1
+        self.position = (self.position - 1) % len(self.commands)
         return self.commands[self.position]
 
 
@@ -211,21 +293,29 @@ class _Command(object):
         """
         self.prompt = prompt
         self.position = 0
-        self.command = ""
+        # The command is edited in place as a list of characters; the string
+        # is only built when requested and cached until the next edit.
+        self._buf = []
+        self._command = ''
         self.length = 0
 
+    @property
+    def command(self):
+        """The current command as a string.
+        """
+        if self._command is None:
+            self._command = ''.join(self._buf)
+        return self._command
+
     @staticmethod
     def _erase_portion(num):
         """Erase a portion of the command line using backspace and spaces.
 
         num[in]            Number of spaces to erase starting from cursor left
+
+        Returns string - the characters to write to erase the portion
         """
-        i = 0
-        while i < num:
-            sys.stdout.write('\b')
-            sys.stdout.write(' ')
-            sys.stdout.write('\b')
-            i += 1
+        return '\b \b' * num
 
     def get_command(self):
         """Return the current command.
@@ -248,60 +338,53 @@ class _Command(object):
 
         Returns string - most local portion of the command.
         """
-        parts = self.command.split(' ')
         # if not at the end of the command line, return the phrase where
         # the cursor is located indicated by self.position
         if self.position < self.length:
-            for i in range(self.position - 1, len(parts[0]) - 1, -1):
-                if self.command[i] == ' ':
-                    return self.command[i + 1:self.position].strip(' ')
+            i = self.command.rfind(' ', 0, self.position)
+            if i >= 0:
+                return self.command[i + 1:self.position].strip(' ')
             return 'ERROR'
         else:
-            return parts[len(parts) - 1]
+            return self.command.rsplit(' ', 1)[-1]
 
     def erase_command(self):
         """Erase the command and reprint the prompt.
         """
-        sys.stdout.write(' ' * (self.length - self.position))
-        self._erase_portion(self.length)
-        self.command = ''
+        sys.stdout.write(' ' * (self.length - self.position) +
+                         self._erase_portion(self.length))
+        self.clear()
 
     def _erase_inline(self, backspace=True):
         """Adjust command line by removing current char
 
         backspace[in]      If True, erase to the left (backspace)
                            If False, erase to the right
+
+        Returns string - the characters to write to erase the char
         """
         if self.position < self.length:
             num_erase = 1 + self.length - self.position
-            if backspace:
-                sys.stdout.write('\b')
-            i = 0
-            while i < num_erase:
-                sys.stdout.write(' ')
-                i += 1
-            i = 0
-            while i < num_erase:
-                sys.stdout.write('\b')
-                i += 1
+            return (('\b' if backspace else '') +
+                    ' ' * num_erase + '\b' * num_erase)
         elif backspace:
-            self._erase_portion(1)
+            return self._erase_portion(1)
+        return ''
 
     def home_keypress(self):
         """Executes the 'HOME' key press.
 
         This moves the cursor to the beginning of the command.
         """
-        tmp = self.position
+        sys.stdout.write('\b' * self.position)
         self.position = 0
-        sys.stdout.write('\b' * tmp)
 
     def end_keypress(self):
         """Executes the 'END' key press.
 
         This moves the cursor to the end of the command.
         """
-        sys.stdout.write(self.command[self.position:self.length])
+        sys.stdout.write(''.join(self._buf[self.position:]))
         self.position = self.length
 
     def delete_keypress(self):
@@ -311,23 +394,15 @@ class _Command(object):
         """
         if self.position < self.length:
             if self.length == 1:
-                self.command = ''
-                sys.stdout.write(' ')
-                sys.stdout.write('\b')
-                self.length = 0
+                self.clear()
+                sys.stdout.write(' \b')
             elif self.length > 0:
-                self._erase_inline(False)
-                old_command = self.command
-                self.command = old_command[0:self.position]
-                if self.position < self.length:
-                    self.command += old_command[self.position + 1:]
-                sys.stdout.write(self.command[self.position:])
-                self.length = len(self.command)
-                spaces = len(self.command[self.position:])
-                # pylint: disable=W0612
-                for i in range(0, spaces):
-                    sys.stdout.write('\b')
-                sys.stdout.flush()
+                erase = self._erase_inline(False)
+                del self._buf[self.position]
+                self._command = None
+                self.length -= 1
+                tail = ''.join(self._buf[self.position:])
+                sys.stdout.write(erase + tail + '\b' * len(tail))
 
     def backspace_keypress(self):
         """Execute the 'BACKSPACE' key press.
@@ -340,18 +415,14 @@ class _Command(object):
         if self.position <= 0:
             return
         if self.position < self.length:
-            self._erase_inline(True)
-            # build new command
-            self.command = self.command[0:self.position - 1] + \
-                self.command[self.position:]
-            sys.stdout.write(self.command[self.position - 1:])
-            i = 0
-            while i < (self.length - self.position):
-                sys.stdout.write('\b')
-                i += 1
+            erase = self._erase_inline(True)
+            del self._buf[self.position - 1]
+            sys.stdout.write(erase + ''.join(self._buf[self.position - 1:]) +
+                             '\b' * (self.length - self.position))
         else:
-            self._erase_portion(1)
-            self.command = self.command[0:self.length - 1]
+            sys.stdout.write(self._erase_portion(1))
+            self._buf.pop()
+        self._command = None
         self.length -= 1
         self.position -= 1
 
@@ -375,7 +446,7 @@ class _Command(object):
         # forward space print character. So we reprint the one character where
         # the position indicator is.
         if self.position < self.length:
-            sys.stdout.write(self.command[self.position:self.position + 1])
+            sys.stdout.write(self._buf[self.position])
             self.position += 1
 
     def replace_command(self, new_cmd):
@@ -384,11 +455,11 @@ class _Command(object):
         This replaces the command and redisplays the prompt and new command.
         """
         if new_cmd != '':
-            self._erase_portion(self.length)
-            self.command = new_cmd
-            sys.stdout.write(self.command)
-            self.position = len(self.command)
-            self.length = len(self.command)
+            sys.stdout.write(self._erase_portion(self.length) + new_cmd)
+            self._buf = list(new_cmd)
+            self._command = new_cmd
+            self.position = len(new_cmd)
+            self.length = len(new_cmd)
 
     def add(self, key):
         """Add one or more characters to the command
@@ -402,32 +473,19 @@ class _Command(object):
             return
         # if position less than length, we're inserting values
         if self.position < self.length:
-            # erase position forward.
+            # erase position forward, write the new tail and move the
+            # cursor back to location at end of new key in a single write.
             num_erase = self.length - self.position
-            i = 0
-            while i < num_erase:
-                sys.stdout.write(' ')
-                i += 1
-            i = 0
-            while i < num_erase:
-                sys.stdout.write('\b')
-                i += 1
-            # build new command
-            self.command = self.command[0:self.position] + key + \
-                self.command[self.position:]
-            sys.stdout.write(self.command[self.position:])
-            self.position += len(key)
-            # move cursor back to location at end of new key
-            i = 0
-            while i < (self.length - self.position + len(key)):
-                sys.stdout.write('\b')
-                i += 1
-            self.length += len(key)
+            self._buf[self.position:self.position] = key
+            tail = ''.join(self._buf[self.position:])
+            sys.stdout.write(' ' * num_erase + '\b' * num_erase + tail +
+                             '\b' * num_erase)
         else:
-            self.command += key
+            self._buf.extend(key)
             sys.stdout.write(key)
-            self.position += len(key)
-            self.length += len(key)
+        self._command = None
+        self.position += len(key)
+        self.length += len(key)
 
     def display_command(self):
         """Redisplay the command
@@ -438,7 +496,8 @@ class _Command(object):
     def clear(self):
         """Clear the command line - user must get the command first.
         """
-        self.command = ''
+        self._buf = []
+        self._command = ''
         self.position = 0
         self.length = 0
 
@@ -457,6 +516,13 @@ class Console(object):
         self.base_commands = []
         self.base_commands.extend(new_base_commands)
         self.base_commands.extend(_BASE_COMMANDS)
+        # Sorted (name or alias, position) pairs used to find the commands
+        # matching a prefix without scanning the whole list.
+        self._command_index = sorted(
+            (key, i) for i, cmd in enumerate(self.base_commands)
+            for key in (cmd['name'], cmd['alias']) if key
+        )
+        self._command_keys = [key for key, _ in self._command_index]
         self.type_complete_mode = _COMMAND_COMPLETE
         self.cmd_line = _Command(self.options.get('prompt', '> '))
         self.width = self.options.get('width', 80)
@@ -465,8 +531,41 @@ class Console(object):
         self.quiet = self.options.get("quiet", False)
         self.variables = Variables(options)
         self.history = _CommandHistory({'max_size': 20})
+        # Keys read from the terminal but not processed yet.
+        self._keys = deque()
         self.position = 0
         self.errors = []
+        # Matches found by TAB completion for the current command line state
+        # so the second TAB of a double TAB does not repeat the search.
+        self._tab_state = None
+        self._tab_cache = {}
+        # All of the variables, listed when completing a bare '$'.
+        self._all_variables = None
+        # Simple commands (up to three words) and the methods that execute
+        # them.
+        self._simple_commands = {
+            'show errors': self.show_errors,
+            'clear errors': self.clear_errors,
+            'show last error': self.show_last_error,
+            'show variables': self.variables.show_variables,
+        }
+        if self.custom_commands:
+            self._simple_commands['show options'] = self.show_custom_options
+        # Command keys and the methods that execute them. Any other command
+        # key does the tab completion.
+        cmd_line = self.cmd_line
+        self._key_actions = {
+            'ESCAPE': cmd_line.erase_command,
+            'DELETE_WIN': cmd_line.delete_keypress,
+            'DELETE_MAC': cmd_line.delete_keypress,
+            'ARROW_UP': self._show_previous_command,
+            'ARROW_DN': self._show_next_command,
+            'ARROW_LT': cmd_line.left_arrow_keypress,
+            'ARROW_RT': cmd_line.right_arrow_keypress,
+            'BACKSPACE': cmd_line.backspace_keypress,
+            'HOME': cmd_line.home_keypress,
+            'END': cmd_line.end_keypress,
+        }
         var_list = self.options.get('variables', [])
         for var in var_list:
             self.variables.add_variable(var['name'], var['value'])
@@ -581,7 +680,8 @@ class Console(object):
         prefix[in]        Prefix of the option
         """
         full_command = self.cmd_line.get_command()
-        matches = self.get_commands(full_command.strip(' '))
+        matches = self._get_tab_matches(self.get_commands,
+                                        full_command.strip(' '))
         if len(matches) > 0:
             self.do_base_command_tab(full_command, matches)
         elif self.custom_commands:
@@ -607,9 +707,8 @@ class Console(object):
         _OPTION_COMPLETE = tab complete for base or custom command options
         """
         buf = self.cmd_line.get_command()
-        parts = buf.split(' ')
         segment = ''
-        if (len(buf) > 0 and len(parts) == 1):
+        if buf and ' ' not in buf:
             self.type_complete_mode = _COMMAND_COMPLETE
         else:
             segment = self.cmd_line.get_nearest_option()
@@ -660,11 +759,14 @@ class Console(object):
                 variable = segment[i + 1:]
                 start_var = i
 
-        if start_var == stop:
+        if not variable:
             # show all of the variables
-            matches = self.variables.get_matches({})
+            if self._all_variables is None:
+                self._all_variables = self.variables.get_matches('')
+            matches = self._all_variables
         else:
-            matches = self.variables.get_matches(variable)
+            matches = self._get_tab_matches(self.variables.get_matches,
+                                            variable)
 
         if self.tab_count == 2:
             if len(matches) > 0:
@@ -676,7 +778,7 @@ class Console(object):
         else:
             # Do command completion here
             if len(matches) == 1:
-                new_var = list(matches[0].items())[0][0] + ' '
+                new_var = next(iter(matches[0])) + ' '
                 self.cmd_line.add(new_var[len(variable):])
                 self.tab_count = 0
 
@@ -687,7 +789,7 @@ class Console(object):
         attempt to perform tab completion for custom commands (if defined).
         """
         # See if command is in the base command list first
-        matches = self.get_commands(command_text)
+        matches = self._get_tab_matches(self.get_commands, command_text)
         if len(matches) > 0:
             self.do_base_command_tab(command_text, matches)
         # Ok, not in command list, now check custom commands
@@ -717,13 +819,41 @@ class Console(object):
             self.tab_count = 0
         else:
             if len(matches) == 1:
-                if matches[0]['name'][:len(command_text)] == command_text:
+                if matches[0]['name'].startswith(command_text):
                     new_cmd = matches[0]['name'] + ' '
                 else:
                     new_cmd = matches[0]['alias'] + ' '
                 self.tab_count = 0
                 self.cmd_line.add(new_cmd[len(command_text):])
 
+    def _check_tab_state(self):
+        """Drop the cached TAB completion results if the command line or
+        the cursor position changed since they were stored.
+        """
+        state = (self.cmd_line.get_command(), self.cmd_line.position)
+        if state != self._tab_state:
+            self._tab_state = state
+            self._tab_cache = {}
+
+    def _get_tab_matches(self, find_matches, prefix):
+        """Get the matches for a TAB completion search.
+
+        The matches are cached until the command line or the cursor position
+        changes, so pressing TAB twice searches only once.
+
+        find_matches[in]   Method that returns the matches for a prefix
+        prefix[in]         Prefix to search for
+
+        Returns list - matches found by find_matches
+        """
+        self._check_tab_state()
+        key = (find_matches, prefix)
+        matches = self._tab_cache.get(key)
+        if matches is None:
+            matches = find_matches(prefix)
+            self._tab_cache[key] = matches
+        return matches
+
     def get_commands(self, cmd_prefix):
         """Get list of commands that match a prefix
 
@@ -731,15 +861,15 @@ class Console(object):
 
         Returns dictionary entry for command based on matching first n chars
         """
-        matches = []
-        stop = len(cmd_prefix)
-        start = 0
-        for cmd in self.base_commands:
-            if cmd['name'][start:stop] == cmd_prefix or \
-               cmd['alias'][start:stop] == cmd_prefix:
-                matches.append(cmd)
+        found = set()
+        num_keys = len(self._command_keys)
+        i = bisect_left(self._command_keys, cmd_prefix)
+        while i < num_keys and self._command_keys[i].startswith(cmd_prefix):
+            found.add(self._command_index[i][1])
+            i += 1
 
-        return matches
+        # Keep the order in which the commands were defined.
+        return [self.base_commands[pos] for pos in sorted(found)]
 
     def show_command_help(self, commands):
         """Show the help for a list of commands.
@@ -768,21 +898,19 @@ class Console(object):
         command = self._replace_variables(command.strip(' '))
         if self.options.get('verbosity', False):
             print("\nExecuting command:", command)
-        # process simple commands
-        if command.lower().startswith('set '):
+        # process simple commands (the longest one has 15 characters)
+        prefix = command[0:16].lower()
+        words = prefix.split(' ', 3)
+        simple_command = self._simple_commands.get(
+            ' '.join(words[0:3]),
+            self._simple_commands.get(' '.join(words[0:2]))
+        )
+        if prefix.startswith('set '):
             self._add_variable(command[4:])
             if not self.quiet:
                 print()
-        elif command[0:11].lower() == 'show errors':
-            self.show_errors()
-        elif command[0:12].lower() == 'clear errors':
-            self.clear_errors()
-        elif command[0:15].lower() == 'show last error':
-            self.show_last_error()
-        elif command[0:14].lower() == 'show variables':
-            self.variables.show_variables()
-        elif self.custom_commands and command[0:12].lower() == 'show options':
-            self.show_custom_options()
+        elif simple_command is not None:
+            simple_command()
         else:
             cmd, parameters = self._get_util_parameters(command)
             if cmd is None:
@@ -795,7 +923,7 @@ class Console(object):
                     self.tab_count = 0
                 elif cmd == '':
                     print()
-                elif cmd.lower() in ['exit', 'quit']:
+                elif cmd.lower() in _EXIT_COMMANDS:
                     print()
                     return True
                 elif self.custom_commands:
@@ -811,6 +939,8 @@ class Console(object):
 
         self.cmd_line.clear()
         self.tab_count = 0
+        # The command may have changed the variables.
+        self._tab_state = None
         return False
 
     def _process_command_keys(self, cmd_key):
@@ -821,27 +951,20 @@ class Console(object):
 
         cmd_key[in]        Key pressed
         """
-        if cmd_key in ['ESCAPE']:
-            self.cmd_line.erase_command()
-        elif cmd_key in ['DELETE_POSIX', 'DELETE_WIN', 'DELETE_MAC']:
-            self.cmd_line.delete_keypress()
+        key_action = self._key_actions.get(cmd_key)
+        if key_action is not None:
+            key_action()
+            # Only consecutive TAB presses count as a double TAB.
             self.tab_count = 0
-        elif cmd_key == 'ARROW_UP':
-            self.cmd_line.replace_command(self.history.previous())
-        elif cmd_key == 'ARROW_DN':
-            self.cmd_line.replace_command(next(self.history))
-        elif cmd_key == 'ARROW_LT':
-            self.cmd_line.left_arrow_keypress()
-        elif cmd_key == 'ARROW_RT':
-            self.cmd_line.right_arrow_keypress()
-        elif cmd_key in ['BACKSPACE_POSIX', 'BACKSPACE_WIN']:
-            self.cmd_line.backspace_keypress()
-        elif cmd_key == 'HOME':
-            self.cmd_line.home_keypress()
-        elif cmd_key == 'END':
-            self.cmd_line.end_keypress()
         else:  # 'TAB'
-            segment = self._set_complete_mode()
+            # On a double TAB reuse the mode found by the first TAB.
+            self._check_tab_state()
+            complete_mode = self._tab_cache.get('mode')
+            if complete_mode is None:
+                segment = self._set_complete_mode()
+                self._tab_cache['mode'] = (self.type_complete_mode, segment)
+            else:
+                self.type_complete_mode, segment = complete_mode
             self.tab_count += 1
             if self.type_complete_mode == _COMMAND_COMPLETE:
                 self.do_command_tab(self.cmd_line.get_command())
@@ -849,7 +972,16 @@ class Console(object):
                 self.do_option_tab(segment)
             else:  # _VARIABLE_COMPLETE
                 self.do_variable_tab(segment)
-        cmd_key = ''
+
+    def _show_previous_command(self):
+        """Replace the command with the previous command in history.
+        """
+        self.cmd_line.replace_command(self.history.previous())
+
+    def _show_next_command(self):
+        """Replace the command with the next command in history.
+        """
+        self.cmd_line.replace_command(next(self.history))
 
     def _add_variable(self, set_command):
         """Add a variable to the list of variables.
@@ -867,6 +999,7 @@ class Console(object):
         name = name.strip().strip('$')
         value = value.strip()
         self.variables.add_variable(name, value)
+        self._all_variables = None
 
     def _replace_variables(self, cmd_string):
         """Replace user-defined variables with values from the internal list.
@@ -878,23 +1011,10 @@ class Console(object):
 
         Returns string - command string with replacements
         """
-        i = 1
-        new_cmd = cmd_string
-        while i > 0:
-            i = new_cmd.find('$', i)
-            if i > 0:
-                j = new_cmd.find(' ', i)
-                if j == -1:
-                    j = len(new_cmd)
-                if j > i:
-                    var_name = new_cmd[i + 1:j]
-                    var = self.variables.find_variable(var_name)
-                    if var is not None:
-                        new_cmd = new_cmd[0:i] + var[var_name] + new_cmd[j:]
-                    else:
-                        i = j
-
-        return new_cmd
+        # The first character is never treated as a variable reference and
+        # variable names extend up to the next space.
+        return cmd_string[:1] + self.variables.replace_variables(
+            cmd_string[1:], _VARIABLE_RE)
 
     @staticmethod
     def _get_util_parameters(cmd_string):
@@ -906,7 +1026,7 @@ class Console(object):
         Returns tuple - command, list of parameters
         """
         try:
-            tokens = shlex.split(cmd_string)
+            tokens = _split_command(cmd_string)
         except ValueError as err:
             print()
             print(("WARNING: Unable to execute command, reason: {0}"
@@ -917,6 +1037,23 @@ class Console(object):
                 return tokens[0], tokens[1:]
         return cmd_string.strip(' '), []
 
+    def _get_key(self):
+        """Get the next key pressed by the user.
+
+        All of the input available is read at once (e.g. pasted text) and
+        split into command keys, other escape sequences and runs of other
+        characters, which are returned one at a time.
+
+        Returns string - command key or characters typed, None at the end
+                         of the input
+        """
+        while not self._keys:
+            chars = getch()
+            if chars is None:
+                return None
+            self._keys.extend(_KEYS_RE.findall(chars))
+        return self._keys.popleft()
+
     def get_user_command(self):
         """Get a command from the user.
 
@@ -924,31 +1061,46 @@ class Console(object):
         the command keys is pressed.
         """
         self.cmd_line.display_command()
-        cmd_string = ''
         cmd_key = None
         self.tab_count = 0
-        while cmd_key not in ['ENTER_POSIX', 'ENTER_WIN']:
-            key = getch()
-            # If a special key, act on it
-            if key in _COMMAND_KEY:
-                cmd_key = _COMMAND_KEY[key]
-                # Windows does things oddly for some keys
-                if os.name != 'posix' and cmd_key == 'SPECIAL_WIN':
-                    key = getch()
-                    cmd_key = _WIN_COMMAND_KEY.get(key)
-                    if cmd_key is None:
-                        continue
-                self._process_command_keys(cmd_key)
-                cmd_string = self.cmd_line.get_command()
-            # else add key to command buffer
-            else:
-                cmd_string = self.cmd_line.get_command()
-                self.cmd_line.add(key)
-                cmd_string = self.cmd_line.get_command()
-            sys.stdout.flush()
+        # If on *nix systems, set the terminal once for the whole command
+        # rather than for each key read.
+        old_settings = None
+        if os.name == 'posix':
+            old_settings = set_key_mode(sys.stdin.fileno())
+        try:
+            while cmd_key not in _ENTER_KEYS:
+                key = self._get_key()
+                if key is None:
+                    # End of the input (e.g. the terminal was closed).
+                    sys.stdout.write('\n')
+                    self.position = 0
+                    return 'exit'
+                cmd_key = _COMMAND_KEY.get(key)
+                # If not a special key, add key to command buffer, unless it
+                # is an escape sequence not handled by the console.
+                if cmd_key is None:
+                    if not key.startswith('\x1b'):
+                        self.cmd_line.add(key)
+                else:
+                    # Windows does things oddly for some keys
+                    if cmd_key == 'SPECIAL_WIN':
+                        key = self._get_key()
+                        cmd_key = _WIN_COMMAND_KEY.get(key)
+                        if cmd_key is None:
+                            continue
+                    self._process_command_keys(cmd_key)
+                # The key handlers only write; flush once per key.
+                sys.stdout.flush()
+        finally:
+            # Ensure terminal IO sys is reset to older state, keeping any
+            # keys typed ahead for the next command.
+            if old_settings is not None:
+                termios.tcsetattr(sys.stdin.fileno(), termios.TCSADRAIN,
+                                  old_settings)
 
         self.position = 0
-        return cmd_string
+        return self.cmd_line.get_command()
 
     def run_console(self, lines=None):
         """Run the console.
@@ -969,32 +1121,28 @@ class Console(object):
             lines = []
         # If we have commands issued by the command line, execute and exit.
         if self.commands is not None:
-            command_list = self.commands.split(';')
-            for command in command_list:
-                command = command.strip('\n').strip(' ')
-                if os.name == 'nt':
-                    command = command.strip('"')
-                if self._do_command(command.strip('"')):
+            for command in _iter_commands(self.commands):
+                # Drop the new line, spaces and (Windows) quotes around it.
+                if self._do_command(command.strip('\n "')):
                     break
 
         # If we have piped input, read the input by line and execute
         elif not os.isatty(sys.stdin.fileno()) or len(lines) > 0:
-            for command in sys.stdin.readlines():
+            # Execute each line as it is read rather than waiting for the
+            # end of the input.
+            for command in sys.stdin:
                 command_list = command.split(';')
                 for cmd in command_list:
-                    cmd = cmd.strip('\n').strip(' ')
-                    if os.name == 'nt':
-                        cmd = cmd.strip('"')
-                    if self._do_command(cmd.strip('"')):
+                    if self._do_command(cmd.strip('\n "')):
                         break
 
         # Otherwise, we are in an interactive mode where we get a command
         # from the user and execute
         else:
-            cmd = ''
             if not self.quiet:
                 print(self.options.get('welcome', 'Welcome to the console!\n'))
-            while cmd.lower() not in ['exit', 'quit']:
+            # _do_command returns True for the exit commands.
+            while True:
                 command = self.get_user_command()
                 self.history.add(command)
                 if self._do_command(command):
@@ -155,6 +155,8 @@ class Utilities(object):
         if options is None:
             options = {}
         self.util_list = []
+        # Utilities found so far, by name.
+        self.util_info_dict = {}
         self.width = options.get('width', _MAX_WIDTH)
         self.util_path = get_util_path(options.get('utildir', ''))
         self.extra_utilities = options.get('add_util', {})
@@ -299,6 +301,7 @@ class Utilities(object):
                 if util_info and util_info["usage"]:
                     util_info["cmd"] = tuple(cmd)
                     self.util_list.append(util_info)
+                    self.util_info_dict[util_name] = util_info
                     working_utils.append(util_name)
 
         self.util_list.sort(key=lambda util_list: util_list['name'])
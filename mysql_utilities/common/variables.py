@@ -24,6 +24,8 @@ import re
 
 from mysql_utilities.common.format import print_dictionary_list
 
+_VARIABLE_RE = re.compile(r'\$(\w+)')
+
 
 class Variables(dict):
     """
@@ -102,25 +104,37 @@ class Variables(dict):
                               var_list, self.width)
         print()
 
-    def replace_variables(self, cmd_string):
+    def replace_variables(self, cmd_string, variable_re=None):
         """Replace all instances of variables with their values.
 
         This method will search a string for all variables designated by the
-        '$' prefix and replace it with values from the list.
+        '$' prefix and replace it with values from the list. Variables not
+        in the list are left as is.
 
         cmd_string[in]     String to search
+        variable_re[in]    Compiled pattern matching a variable reference
+                           with the variable name as first group
+                           Default = '$' followed by word characters
 
         Returns string - string with variables replaced
         """
-        new_cmd = cmd_string
-        finds = re.findall(r'\$(\w+)', cmd_string)
-        for variable in finds:
-            try:
-                new_cmd = new_cmd.replace('$' + variable, str(self[variable]))
-            except KeyError:
-                # something useful when variable was not found?
-                pass
-        return new_cmd
+        if variable_re is None:
+            variable_re = _VARIABLE_RE
+        return variable_re.sub(self._replace_variable, cmd_string)
+
+    def _replace_variable(self, match):
+        """Get the replacement text for a variable reference.
+
+        match[in]          Match object of the variable reference
+
+        Returns string - value of the variable or the matched text if the
+                         variable is not in the list
+        """
+        try:
+            return str(self[match.group(1)])
+        except KeyError:
+            # something useful when variable was not found?
+            return match.group(0)
 
     def search_by_key(self, pattern):
         """Find value by key pattern